@@ -0,0 +1,42 @@
+"""Measures the memory and time taken to compose a constant with a
+Function on a large array, as in (2.5 @ f)(x).
+
+Run with `python -m benchmarks.broadcast`.
+"""
+
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from functionplus import Function
+
+N_ELEMENTS = 10_000_000
+
+
+def full_like(x: np.ndarray) -> np.ndarray:
+    """How the constant used to be broadcast, with a full-size array."""
+
+    return np.full_like(x, 2.5)
+
+
+def measure(label: str, function, inputs: np.ndarray) -> None:
+    tracemalloc.start()
+    function(inputs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = min(timeit.repeat(lambda: function(inputs), number=1, repeat=5))
+    print(f"{label:>10}: {peak / 2**20:10.2f} MiB peak, {seconds * 1e3:8.3f} ms")
+
+
+def main() -> None:
+    x = Function.id("x")
+    inputs = np.ones(N_ELEMENTS)
+
+    measure("full_like", Function(full_like) @ x, inputs)
+    measure("broadcast", 2.5 @ x, inputs)
+
+
+if __name__ == "__main__":
+    main()
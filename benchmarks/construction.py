@@ -0,0 +1,48 @@
+"""Measures how quickly Function expressions can be built.
+
+Run with `python -m benchmarks.construction`.
+"""
+
+import timeit
+
+from functionplus import Function
+
+N_EXPRESSIONS = 20_000
+OPS_PER_EXPRESSION = 5
+
+
+def build_cached(x: Function) -> None:
+    """Builds expressions through the (cached) operator descriptors."""
+
+    for i in range(N_EXPRESSIONS):
+        h = x + i
+        h = h * x
+        h = 2 - h
+        h = -h / x
+
+
+def build_uncached(x: Function) -> None:
+    """Builds the same expressions, rebuilding each operator
+    implementation on every use as attribute access used to."""
+
+    def apply(name, fself, *others):
+        return Function.__dict__[name].op(Function)(fself, *others)
+
+    for i in range(N_EXPRESSIONS):
+        h = apply("__add__", x, i)
+        h = apply("__mul__", h, x)
+        h = apply("__rsub__", h, 2)
+        h = apply("__truediv__", apply("__neg__", h), x)
+
+
+def main() -> None:
+    x = Function.id("x")
+
+    for label, build in [("uncached", build_uncached), ("cached", build_cached)]:
+        seconds = min(timeit.repeat(lambda: build(x), number=1, repeat=3))
+        rate = OPS_PER_EXPRESSION * N_EXPRESSIONS / seconds
+        print(f"{label:>10}: {rate:,.0f} operations/s")
+
+
+if __name__ == "__main__":
+    main()
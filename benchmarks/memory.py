@@ -0,0 +1,97 @@
+"""Measures the memory taken by many small Functions, comparing the
+slotted layout of Function and the graph nodes with the __dict__-based
+layout they used to have, in which Function copied its leaf's metadata
+with functools.update_wrapper.
+
+Run with `python -m benchmarks.memory`.
+"""
+
+import operator
+import tracemalloc
+from functools import WRAPPER_ASSIGNMENTS, update_wrapper
+
+from functionplus import Function
+from functionplus.core import ops
+
+N_FUNCTIONS = 10_000
+
+
+def square(v: float) -> float:
+    """Squares v."""
+
+    return v * v
+
+
+class DictNode:
+    """A graph node keeping its attributes in a __dict__, as before."""
+
+    def __init__(self, **fields) -> None:
+        self.__dict__.update(fields)
+        self.label = self.plan = None
+
+
+class DictFunction:
+    """A Function keeping its attributes in a __dict__, as before."""
+
+    def __init__(self, node: DictNode) -> None:
+        function = node
+        if hasattr(node, "function"):
+            function = node.function
+            update_wrapper(self, function, WRAPPER_ASSIGNMENTS, ())
+        self.node = node
+        self.function = function
+
+
+def dict_leaf(function) -> DictNode:
+    return DictNode(function=function)
+
+
+def dict_binary(op, left: DictNode, right: DictNode) -> DictNode:
+    return DictNode(op=op, children=(left, right))
+
+
+# shared by every formula, as Function.id("x") is below
+X = dict_leaf(ops.identity)
+
+
+def legacy_formula(i: int) -> DictFunction:
+    """Builds (x + i) * x - i in the old layout."""
+
+    x = X
+    added = dict_binary(operator.add, x, DictNode(value=i))
+    product = dict_binary(operator.mul, added, x)
+    return DictFunction(dict_binary(operator.sub, product, DictNode(value=i)))
+
+
+def measure(build) -> float:
+    """Returns the bytes allocated per object built by build(i)."""
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    objects = [build(i) for i in range(N_FUNCTIONS)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (after - before) / N_FUNCTIONS
+
+
+def main() -> None:
+    x = Function.id("x")
+    cases = {
+        "leaf": (
+            lambda i: DictFunction(dict_leaf(square)),
+            lambda i: Function(square),
+        ),
+        "formula": (legacy_formula, lambda i: (x + i) * x - i),
+    }
+
+    for label, (legacy, slotted) in cases.items():
+        before, after = measure(legacy), measure(slotted)
+        print(
+            f"{label:>8}: {before:7.1f} B -> {after:7.1f} B per Function "
+            f"({1 - after / before:.0%} smaller)"
+        )
+
+
+if __name__ == "__main__":
+    main()
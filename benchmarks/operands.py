@@ -0,0 +1,51 @@
+"""Counts how many times the leaves of f op g, f op 2 and the reflected
+2 op f are called per evaluation, for every binary operator, and times
+each evaluation. Each leaf should be called exactly once.
+
+Run with `python -m benchmarks.operands`.
+"""
+
+import operator
+import timeit
+
+from functionplus import Function
+from functionplus.core import ops
+
+N_CALLS = 10_000
+
+
+def main() -> None:
+    calls = [0]
+
+    def f(x):
+        calls[0] += 1
+        return x + 1
+
+    def g(x):
+        calls[0] += 1
+        return x - 1
+
+    f, g = Function(f), Function(g)
+    print(f"{'operator':>10} {'form':>8} {'leaf calls':>11} {'time/call':>12}")
+    for op_name in sorted(ops.binary_symbols):
+        op = getattr(operator, op_name)
+        symbol = ops.binary_symbols[op_name]
+        forms = [
+            ("f op g", op(f, g), 2),
+            ("f op 2", op(f, 2), 1),
+            ("2 op f", op(2, f), 1),
+        ]
+        for form, h, leaves in forms:
+            calls[0] = 0
+            h(3)
+            per_call = calls[0]
+            seconds = min(timeit.repeat(lambda: h(3), number=N_CALLS, repeat=3))
+            flag = "" if per_call == leaves else f"  <- expected {leaves}"
+            print(
+                f"{symbol:>10} {form:>8} {per_call:>11}"
+                f" {seconds / N_CALLS * 1e6:>9.2f} us{flag}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measures the per-call overhead of evaluating a Function on a scalar,
+comparing the plan interpreter's specialized steps with a generic loop
+over the steps (how plans used to be interpreted), a compiled plan and
+plain Python, as well as the whole call of an (uncompiled) Function.
+
+Run with `python -m benchmarks.scalar`.
+"""
+
+import timeit
+
+from functionplus import Function
+from functionplus.core.evaluator import get_plan
+
+N_CALLS = 100_000
+
+
+def generic(plan):
+    """Interprets plan without specialized steps, building an argument
+    list for every operator."""
+
+    def call(args, kwargs):
+        values = plan.template.copy()
+        for slot, function, operands, dead in plan.steps:
+            if operands is None:
+                values[slot] = function(*args, **kwargs)
+            else:
+                values[slot] = function(*[values[i] for i in operands])
+            for i in dead:
+                values[i] = None
+        return values[plan.output]
+
+    return call
+
+
+def main() -> None:
+    x = Function.id("x")
+    h = (x * 2 + 1) * x - 3 / x
+    plan = get_plan(h.node)
+
+    def python(v):
+        return (v * 2 + 1) * v - 3 / v
+
+    # a copy of the root gets its own plan, which is compiled
+    compiled = Function(h.node.labeled("h")).compile()
+
+    candidates = [
+        ("python", lambda: python(3.0)),
+        ("generic", lambda: interpret((3.0,), {})),
+        ("specialized", lambda: plan((3.0,), {})),
+        ("compiled", lambda: compiled.node.plan.compiled(3.0)),
+        ("Function", lambda: h(3.0)),
+    ]
+    interpret = generic(plan)
+    for label, call in candidates:
+        assert call() == python(3.0)
+        seconds = min(timeit.repeat(call, number=N_CALLS, repeat=7))
+        print(f"{label:>12}: {seconds / N_CALLS * 1e9:8.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+
+import numpy as np
+
+from . import types as ftypes
+from .wrappers import Wrapper
+
+__all__ = ["Batcher"]
+
+
+class Batcher(Wrapper):
+    """An asynchronous callable that coalesces concurrent calls on scalars
+    into a single vectorized call on NumPy arrays.
+
+    Each call adds its arguments to the pending batch and waits. The batch
+    is evaluated once it holds max_batch calls, or max_delay_ms after its
+    first call, whichever comes first: the i-th arguments of every call are
+    stacked into an array, the function is called once on those arrays and
+    each caller gets its own element of the result. If that call raises,
+    every caller in the batch gets the exception.
+
+    The function must be elementwise (as arithmetic on NumPy arrays is)
+    and may be asynchronous. Every call must pass the same number of
+    positional arguments, and calls must all come from one event loop.
+
+    Attributes:
+        function (GenericFunction): The vectorized function.
+        max_batch (int): The most calls evaluated at once.
+        max_delay_ms (float): The longest a call waits for others to
+        join its batch, in milliseconds.
+        calls (int): The number of calls made so far.
+        batches (int): The number of batches evaluated so far.
+    """
+
+    def __init__(
+        self,
+        function: ftypes.GenericFunction,
+        max_batch: int = 1024,
+        max_delay_ms: float = 1.0,
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be a positive integer")
+        if max_delay_ms < 0:
+            raise ValueError("max_delay_ms must be non-negative")
+
+        super().__init__(function)
+        self.max_batch = max_batch
+        self.max_delay_ms = max_delay_ms
+        self.calls = self.batches = 0
+
+        self._arity: int | None = None
+        self._pending: list[tuple[tuple[ftypes.Any, ...], asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def __call__(self, *args: ftypes.Any) -> ftypes.Any:
+        if self._arity is None:
+            self._arity = len(args)
+        elif len(args) != self._arity:
+            raise TypeError(
+                f"{self.__name__} takes {self._arity} arguments, not {len(args)}"
+            )
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((args, future))
+        self.calls += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Evaluates the pending batch."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+
+        futures = [future for _, future in batch]
+        try:
+            calls = [args for args, _ in batch]
+            columns = [np.asarray(column) for column in zip(*calls)]
+            result = self.function(*columns)
+        except Exception as error:  # pylint: disable=W0718
+            _fail(futures, error)
+            return
+
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            task.add_done_callback(lambda task: _fan_out(futures, task))
+        else:
+            _deliver(futures, result)
+
+
+def _fail(futures: list[asyncio.Future], error: BaseException) -> None:
+    for future in futures:
+        if not future.done():
+            future.set_exception(error)
+
+
+def _deliver(futures: list[asyncio.Future], result: ftypes.Any) -> None:
+    """Gives each future its element of result."""
+
+    result = np.asarray(result)
+    if result.ndim == 0:
+        # e.g. a constant function, whose result applies to every call
+        result = np.broadcast_to(result, (len(futures),))
+    if len(result) != len(futures):
+        _fail(futures, ValueError("the function isn't elementwise"))
+        return
+    for future, value in zip(futures, result):
+        if not future.done():
+            future.set_result(value)
+
+
+def _fan_out(futures: list[asyncio.Future], task: asyncio.Future) -> None:
+    if task.cancelled():
+        for future in futures:
+            future.cancel()
+    elif task.exception() is not None:
+        _fail(futures, task.exception())
+    else:
+        _deliver(futures, task.result())
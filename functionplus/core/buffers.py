@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import operator
+
+import numpy as np
+
+from . import types as ftypes
+
+__all__ = ["UFUNCS", "as_ufunc", "Layout", "FusedPlan"]
+
+# the ufuncs NumPy arrays use to implement each operator
+UFUNCS = {
+    operator.abs: np.absolute,
+    operator.neg: np.negative,
+    operator.pos: np.positive,
+    operator.add: np.add,
+    operator.sub: np.subtract,
+    operator.mul: np.multiply,
+    operator.truediv: np.true_divide,
+    operator.floordiv: np.floor_divide,
+    operator.mod: np.remainder,
+    operator.pow: np.power,
+    operator.and_: np.bitwise_and,
+    operator.or_: np.bitwise_or,
+    operator.xor: np.bitwise_xor,
+    operator.eq: np.equal,
+    operator.ne: np.not_equal,
+    operator.lt: np.less,
+    operator.le: np.less_equal,
+    operator.gt: np.greater,
+    operator.ge: np.greater_equal,
+}
+
+# the dtype kinds (bool, signed, unsigned, float and complex)
+# whose results are written into scratch buffers
+BUFFERED_KINDS = "biufc"
+
+
+def as_ufunc(function: ftypes.GenericFunction, nin: int) -> np.ufunc | None:
+    """Returns the single-output ufunc with nin inputs equivalent to
+    function on NumPy arrays, or None if there isn't one."""
+
+    try:
+        function = UFUNCS.get(function, function)
+    except TypeError:
+        return None
+    if isinstance(function, np.ufunc) and function.nin == nin and function.nout == 1:
+        return function
+    return None
+
+
+def signature(
+    args: tuple[ftypes.Any, ...], kwargs: dict[str, ftypes.Any]
+) -> tuple[ftypes.Any, ...] | None:
+    """Returns the dtypes and shapes of the arguments of a call, or None
+    if any of them isn't a plain NumPy array."""
+
+    arrays = [*args, *kwargs.values()]
+    if not all(type(arg) is np.ndarray for arg in arrays):
+        return None
+    return (
+        tuple(kwargs),
+        tuple((arg.dtype, arg.shape) for arg in arrays),
+    )
+
+
+class Layout:
+    """Where each step of a plan writes its output for inputs of one
+    particular signature.
+
+    Attributes:
+        entries (list[tuple[ufunc, int, tuple] | None]): For each step,
+        either None if it's called normally or the ufunc it's computed
+        with, the index of the buffer it writes to and the (operand
+        index, dtype, shape) of each computed operand, which are checked
+        before the buffer is used.
+        buffers (list[tuple[tuple[int, ...], dtype]]): The shape and
+        dtype of each scratch buffer.
+    """
+
+    def __init__(
+        self,
+        plan,
+        args: tuple[ftypes.Any, ...],
+        kwargs: dict[str, ftypes.Any],
+        info: dict[int, tuple[type, np.dtype | None, tuple[int, ...]]],
+    ) -> None:
+        computed = {step[0] for step in plan.steps}
+
+        def is_array(slot_info) -> bool:
+            kind, dtype, shape = slot_info
+            return kind is np.ndarray and dtype.kind in BUFFERED_KINDS and shape != ()
+
+        def buffer_key(slot: int) -> tuple[tuple[int, ...], np.dtype]:
+            _, dtype, shape = info[slot]
+            return shape, dtype
+
+        # finds which steps can write into a buffer
+        fusible: dict[int, tuple[np.ufunc, tuple]] = {}
+        for slot, function, operands, _ in plan.steps:
+            if not is_array(info[slot]):
+                continue
+            if operands is None:
+                kinds = [arg.dtype.kind for arg in args]
+                if kwargs or any(kind not in BUFFERED_KINDS for kind in kinds):
+                    continue
+                ufunc, checks = as_ufunc(function, len(args)), ()
+            else:
+                ufunc = as_ufunc(function, len(operands))
+                if any(i in computed and not is_array(info[i]) for i in operands):
+                    continue
+                checks = tuple(
+                    (k, info[i][1], info[i][2])
+                    for k, i in enumerate(operands)
+                    if i in computed
+                )
+            if ufunc is not None:
+                fusible[slot] = (ufunc, checks)
+
+        # buffers passed to other steps or returned might be aliased by
+        # their outputs, so they're never reused
+        escaped = {plan.output}
+        for slot, _, operands, _ in plan.steps:
+            if slot not in fusible:
+                escaped.update(operands or ())
+
+        # assigns buffers by liveness, reusing them as soon as their
+        # values are dead (including as the output of the step using
+        # them last, which makes that step in-place)
+        self.entries: list = []
+        self.buffers: list[tuple[tuple[int, ...], np.dtype]] = []
+        free: dict[tuple[ftypes.Any, ...], list[int]] = {}
+        buffer_of: dict[int, int] = {}
+        for slot, _, _, dead in plan.steps:
+            for i in dead:
+                if i in buffer_of and i not in escaped:
+                    free.setdefault(buffer_key(i), []).append(buffer_of[i])
+
+            if slot not in fusible:
+                self.entries.append(None)
+                continue
+
+            key = buffer_key(slot)
+            pool = free.get(key)
+            if pool:
+                buffer = pool.pop()
+            else:
+                buffer = len(self.buffers)
+                self.buffers.append(key)
+            buffer_of[slot] = buffer
+
+            ufunc, checks = fusible[slot]
+            self.entries.append((ufunc, buffer, checks))
+
+
+class FusedPlan:
+    """Evaluates a plan on NumPy arrays with preallocated scratch buffers.
+
+    The first call with arguments of a given signature (dtypes and shapes)
+    evaluates the plan normally while recording the type of each step's
+    output, from which a Layout is made. Later calls with that signature
+    compute each elementwise step with its ufunc's out argument, writing
+    into a small pool of scratch buffers that are reused (and updated in
+    place) as soon as the values they hold are no longer needed. Steps
+    whose operands turn out not to match the recorded types are simply
+    evaluated normally.
+
+    Calls with arguments that aren't all plain NumPy arrays are evaluated
+    normally. Each call allocates its own buffers, so a FusedPlan can be
+    called from several threads at once.
+
+    Given an out array, the last step is computed straight into it if it's
+    an elementwise step whose result has out's dtype and shape, in which
+    case out is returned; otherwise the result is returned as usual and
+    out is left alone, so callers must check which happened.
+
+    Attributes:
+        plan (Plan): The plan being evaluated.
+        max_layouts (int): How many signatures' layouts are kept.
+
+    Raises:
+        ValueError: If the plan is asynchronous.
+    """
+
+    # tells chunked.evaluate_chunked that calls take an out argument
+    writes_out = True
+
+    def __init__(self, plan, max_layouts: int = 8) -> None:
+        if plan.is_async:
+            raise ValueError("asynchronous functions can't be fused")
+        self.plan = plan
+        self.max_layouts = max_layouts
+        self.layouts: dict[tuple[ftypes.Any, ...], Layout] = {}
+
+    def __call__(
+        self,
+        args: tuple[ftypes.Any, ...],
+        kwargs: dict[str, ftypes.Any],
+        out: np.ndarray | None = None,
+    ) -> ftypes.Any:
+        key = signature(args, kwargs)
+        if key is None:
+            return self.plan(args, kwargs)
+
+        layout = self.layouts.get(key)
+        if layout is None:
+            return self._trace(key, args, kwargs)
+        return self._run(layout, args, kwargs, out)
+
+    def _trace(self, key, args, kwargs) -> ftypes.Any:
+        """Evaluates the plan normally, making the layout for key."""
+
+        plan = self.plan
+        values = plan.template.copy()
+        info = {}
+        for slot, function, operands, dead in plan.steps:
+            if operands is None:
+                value = values[slot] = function(*args, **kwargs)
+            else:
+                value = values[slot] = function(*[values[i] for i in operands])
+            dtype, shape = getattr(value, "dtype", None), getattr(value, "shape", None)
+            info[slot] = (type(value), dtype, shape)
+            for i in dead:
+                values[i] = None
+
+        # other threads may be tracing (and evicting) at the same time
+        layout = Layout(plan, args, kwargs, info)
+        while len(self.layouts) >= self.max_layouts:
+            try:
+                self.layouts.pop(next(iter(self.layouts)), None)
+            except (RuntimeError, StopIteration):
+                break
+        self.layouts[key] = layout
+        return values[plan.output]
+
+    def _run(self, layout: Layout, args, kwargs, out=None) -> ftypes.Any:
+        plan = self.plan
+        values = plan.template.copy()
+        buffers: list[np.ndarray | None] = [None] * len(layout.buffers)
+        for (slot, function, operands, dead), entry in zip(plan.steps, layout.entries):
+            inputs = args if operands is None else [values[i] for i in operands]
+            if entry is not None and all(
+                type(inputs[k]) is np.ndarray
+                and inputs[k].dtype == dtype
+                and inputs[k].shape == shape
+                for k, dtype, shape in entry[2]
+            ):
+                ufunc, buffer, _ = entry
+                shape, dtype = layout.buffers[buffer]
+                if (
+                    slot == plan.output
+                    and out is not None
+                    and out.dtype == dtype
+                    and out.shape == shape
+                ):
+                    # the output's buffer is never read again, so the
+                    # caller's array can take its place
+                    values[slot] = ufunc(*inputs, out=out)
+                else:
+                    if buffers[buffer] is None:
+                        buffers[buffer] = np.empty(shape, dtype)
+                    values[slot] = ufunc(*inputs, out=buffers[buffer])
+            elif operands is None:
+                values[slot] = function(*args, **kwargs)
+            else:
+                values[slot] = function(*inputs)
+            for i in dead:
+                values[i] = None
+        return values[plan.output]
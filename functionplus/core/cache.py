@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from . import types as ftypes
+from .evaluator import constant_key
+from .wrappers import Wrapper
+
+__all__ = ["CacheInfo", "Memoized", "AsyncMemoized", "make_key"]
+
+POLICIES = ("lru", "fifo")
+ARRAY_MODES = ("content", "identity")
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a Memoized function's cache."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
+
+
+def _is_array(obj: ftypes.Any) -> bool:
+    """Checks if obj is a NumPy array, without importing NumPy
+    (if it hasn't been imported, obj can't be an array)."""
+
+    numpy = sys.modules.get("numpy")
+    return numpy is not None and isinstance(obj, numpy.ndarray)
+
+
+def _arg_key(arg: ftypes.Any, arrays: str) -> ftypes.Any:
+    """Returns a hashable key for a single argument.
+
+    Raises:
+        TypeError: If no key can be made for arg.
+    """
+
+    if _is_array(arg):
+        if arrays == "identity":
+            return ("ndarray", id(arg))
+        if arg.dtype.hasobject:
+            raise TypeError("object arrays can't be keyed by content")
+        contiguous = sys.modules["numpy"].ascontiguousarray(arg)
+        digest = hashlib.blake2b(contiguous.data, digest_size=16)
+        return ("ndarray", arg.dtype.str, arg.shape, digest.digest())
+    hash(arg)
+    return constant_key(arg)
+
+
+def make_key(
+    args: tuple[ftypes.Any, ...], kwargs: dict[str, ftypes.Any], arrays: str = "content"
+) -> tuple[ftypes.Any, ...] | None:
+    """Makes a hashable key from the arguments of a call.
+
+    Hashable arguments are keyed by type and value (floats by their exact
+    value, so that 0.0 and -0.0 differ), while NumPy arrays are keyed
+    either by dtype, shape and a digest of their contents or, if arrays
+    is 'identity', by their id alone.
+
+    Args:
+        args (tuple[Any, ...]): The call's positional arguments.
+        kwargs (dict[str, Any]): The call's keyword arguments.
+        arrays (str, optional): How to key arrays; either 'content' or
+        'identity'. Defaults to 'content'.
+
+    Returns:
+        tuple[Any, ...] | None: The key, or None if some argument can't
+        be keyed.
+    """
+
+    try:
+        return (
+            tuple(_arg_key(arg, arrays) for arg in args),
+            tuple((name, _arg_key(kwargs[name], arrays)) for name in sorted(kwargs)),
+        )
+    except TypeError:
+        return None
+
+
+class Memoized(Wrapper):
+    """A callable that memoizes the results of another callable.
+
+    Calls whose arguments can't be keyed (see make_key) are passed
+    straight through and counted as misses. NumPy arrays returned from
+    the cache are made read-only, since they're shared between calls,
+    and are copies if they share memory with one of the arguments.
+
+    Attributes:
+        function (GenericFunction): The callable being memoized.
+        maxsize (int | None): The most results kept at once, or None
+        for no limit.
+        policy (str): Which result to evict once the cache is full;
+        either 'lru' (least recently used) or 'fifo' (oldest).
+        arrays (str): How arrays are keyed; either 'content' or 'identity'.
+        In 'identity' mode, arrays used as keys are kept alive by the cache
+        and in-place changes to them aren't detected.
+
+    Pickled copies start with an empty cache.
+    """
+
+    def __init__(
+        self,
+        function: ftypes.GenericFunction,
+        maxsize: int | None = 128,
+        policy: str = "lru",
+        arrays: str = "content",
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+        if arrays not in ARRAY_MODES:
+            raise ValueError(f"arrays must be one of {ARRAY_MODES}, not {arrays!r}")
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("maxsize must be a non-negative integer or None")
+
+        super().__init__(function)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.arrays = arrays
+
+        self._results: OrderedDict[ftypes.Any, tuple[ftypes.Any, tuple]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def __call__(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        key = make_key(args, kwargs, self.arrays)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        return self._store(key, args, kwargs, self.function(*args, **kwargs))
+
+    def _lookup(self, key: ftypes.Any) -> tuple[ftypes.Any, tuple] | None:
+        """Returns the cache entry for key, counting a hit, or None
+        (counting a miss) if there isn't one."""
+
+        with self._lock:
+            entry = None if key is None else self._results.get(key)
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                if self.policy == "lru":
+                    self._results.move_to_end(key)
+            return entry
+
+    def _store(
+        self,
+        key: ftypes.Any,
+        args: tuple[ftypes.Any, ...],
+        kwargs: dict[str, ftypes.Any],
+        result: ftypes.Any,
+    ) -> ftypes.Any:
+        """Caches the result of a call, returning what the caller gets."""
+
+        if key is None or self.maxsize == 0:
+            return result
+
+        if _is_array(result):
+            # a read-only view, since the result may be an array the caller
+            # owns (e.g. one of the arguments), which must stay writable,
+            # and a copy if it shares memory with an argument, which the
+            # caller could still change in place
+            numpy = sys.modules["numpy"]
+            arrays = [arg for arg in (*args, *kwargs.values()) if _is_array(arg)]
+            if any(numpy.shares_memory(result, arg) for arg in arrays):
+                result = result.copy()
+            else:
+                result = result.view()
+            result.setflags(write=False)
+        # in identity mode, the arguments are stored alongside the result
+        # so that their ids can't be reused while they're in the cache
+        entry = (result, (args, kwargs) if self.arrays == "identity" else ())
+        with self._lock:
+            self._results[key] = entry
+            self._results.move_to_end(key)
+            while self.maxsize is not None and len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self._evictions += 1
+        return result
+
+    def __getstate__(self) -> dict[str, ftypes.Any]:
+        # copies (e.g. in other processes) start with an empty cache
+        state = self.__dict__.copy()
+        del state["_lock"], state["_results"]
+        return state
+
+    def __setstate__(self, state: dict[str, ftypes.Any]) -> None:
+        self.__dict__.update(state)
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Returns the cache's hit, miss and eviction statistics."""
+
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                self.maxsize,
+                len(self._results),
+            )
+
+    def cache_clear(self) -> None:
+        """Empties the cache and resets its statistics."""
+
+        with self._lock:
+            self._results.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+class AsyncMemoized(Memoized):
+    """A Memoized for asynchronous callables, which caches the awaited
+    results rather than the coroutines (which can only be awaited once).
+
+    Identical calls awaited at the same time each compute the result;
+    see singleflight.AsyncSingleFlight to share it instead.
+    """
+
+    async def __call__(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        key = make_key(args, kwargs, self.arrays)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        result = await self.function(*args, **kwargs)
+        return self._store(key, args, kwargs, result)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from . import threads
+from . import types as ftypes
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "CANDIDATES",
+    "chunks",
+    "evaluate_chunked",
+    "calibrate",
+]
+
+# elements per chunk, which keeps a handful of float64 intermediates in L2
+DEFAULT_CHUNK_SIZE = 1 << 14
+# the chunk sizes tried by calibrate
+CANDIDATES = tuple(1 << k for k in range(10, 21, 2))
+
+
+def chunks(
+    args: tuple[ftypes.Any, ...], chunk_size: int
+) -> tuple[int, list[slice]]:
+    """Splits the first axis of the array arguments into chunks.
+
+    Args:
+        args (tuple[Any, ...]): The positional arguments of a call. Those
+        that are NumPy arrays with at least one dimension are chunked, and
+        must all have the same length.
+        chunk_size (int): The (approximate) number of elements per chunk.
+        Rows are never split, so chunks have at least one row.
+
+    Raises:
+        ValueError: If no argument can be chunked, or the arrays'
+        lengths differ.
+
+    Returns:
+        tuple[int, list[slice]]: The arrays' length and the slices
+        of their first axis making up each chunk.
+    """
+
+    arrays = [arg for arg in args if isinstance(arg, np.ndarray) and arg.ndim]
+    if not arrays:
+        raise ValueError("no array arguments to chunk")
+    length = len(arrays[0])
+    if any(len(array) != length for array in arrays):
+        raise ValueError("array arguments must have the same length")
+
+    row_size = max(max(array.size // max(length, 1) for array in arrays), 1)
+    rows = max(chunk_size // row_size, 1)
+    return length, [slice(start, start + rows) for start in range(0, length, rows)]
+
+
+def _slice_args(args: tuple[ftypes.Any, ...], rows: slice) -> tuple[ftypes.Any, ...]:
+    return tuple(
+        arg[rows] if isinstance(arg, np.ndarray) and arg.ndim else arg for arg in args
+    )
+
+
+def _evaluate_chunk(
+    run: ftypes.Callable[[tuple, dict], ftypes.Any],
+    args: tuple[ftypes.Any, ...],
+    kwargs: dict[str, ftypes.Any],
+    rows: slice,
+    length: int,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Evaluates run on the given rows of the arguments, checking that
+    the result has one row per row of the arguments. If out is given,
+    the result is written into the same rows of it, by run itself if it
+    can (see evaluate_chunked) and otherwise by copying."""
+
+    target = None if out is None else out[rows]
+    if target is not None and getattr(run, "writes_out", False):
+        result = run(_slice_args(args, rows), kwargs, out=target)
+    else:
+        result = run(_slice_args(args, rows), kwargs)
+    result = np.asarray(result)
+    n_rows = len(range(*rows.indices(length)))
+    if not result.ndim or len(result) != n_rows:
+        raise ValueError("the function isn't elementwise along the first axis")
+    if target is not None and result is not target:
+        target[...] = result
+    return result
+
+
+def evaluate_chunked(
+    run: ftypes.Callable[[tuple, dict], ftypes.Any],
+    args: tuple[ftypes.Any, ...],
+    kwargs: dict[str, ftypes.Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Evaluates run(args, kwargs) one chunk of the arguments' first axis
+    at a time, writing each chunk's result into a single output array.
+
+    This is only valid if each row of the output depends only on the
+    same row of the (array) arguments, as for elementwise functions.
+
+    If run has a true writes_out attribute (as buffers.FusedPlan does),
+    it's also passed out=, the rows of the output the chunk's result
+    belongs in, and may compute its last step straight into them (and
+    return them); otherwise each chunk's result is copied into them.
+
+    With several workers, the chunks are split between the calling thread
+    and threads.shared_executor, each writing into its own rows of the
+    output. This only speeds things up if run spends most of its time in
+    code that releases the GIL, such as NumPy ufuncs, and run must be safe
+    to call from several threads at once.
+
+    Args:
+        run (Callable[[tuple, dict], Any]): Evaluates the function, given
+        its positional and keyword arguments.
+        args (tuple[Any, ...]): The positional arguments, chunked as
+        described in chunks.
+        kwargs (dict[str, Any]): The keyword arguments, which are passed
+        to every chunk unchanged.
+        chunk_size (int, optional): The (approximate) number of elements per
+        chunk. Defaults to DEFAULT_CHUNK_SIZE.
+        workers (int | None, optional): The number of threads evaluating
+        chunks. Defaults to None, meaning the calling thread alone.
+        out (ndarray | None, optional): If given, the results are written
+        into this array (e.g. one in shared memory) instead of a new one.
+        Defaults to None.
+
+    Raises:
+        ValueError: If a chunk's result doesn't have one row per row
+        of its arguments, out has the wrong length, or workers isn't
+        positive.
+
+    Returns:
+        ndarray: The output array.
+    """
+
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be a positive integer or None")
+
+    length, slices = chunks(args, chunk_size)
+    if out is not None and len(out) != length:
+        raise ValueError("out must have one row per row of the arguments")
+
+    def write(group: list[slice]) -> None:
+        for rows in group:
+            _evaluate_chunk(run, args, kwargs, rows, length, out)
+
+    if workers is None or workers == 1 or len(slices) == 1:
+        if out is None:
+            # the first chunk gives the output's dtype and the shape of its rows
+            first = _evaluate_chunk(run, args, kwargs, slices[0], length)
+            out = np.empty((length, *first.shape[1:]), first.dtype)
+            out[slices[0]] = first
+            slices = slices[1:]
+        write(slices)
+        return out
+
+    if out is None:
+        # evaluating the first row alone gives the output's dtype and the
+        # shape of its rows, so that every chunk can be evaluated at once
+        probe = _evaluate_chunk(run, args, kwargs, slice(0, 1), length)
+        out = np.empty((length, *probe.shape[1:]), probe.dtype)
+
+    # each worker evaluates every workers-th chunk, the calling thread
+    # among them, and groups the shared executor hasn't started by the
+    # time the calling thread is done are taken back, so that it never
+    # waits on an executor that may be busy with its own caller
+    groups = [slices[i::workers] for i in range(min(workers, len(slices)))]
+    executor = threads.shared_executor()
+    futures = [(executor.submit(write, group), group) for group in groups[1:]]
+    try:
+        write(groups[0])
+    except BaseException:
+        for future, _ in futures:
+            future.cancel()
+        raise
+    for future, group in futures:
+        if future.cancel():
+            write(group)
+        else:
+            # re-raises any exception from the executor
+            future.result()
+    return out
+
+
+def calibrate(
+    run: ftypes.Callable[[tuple, dict], ftypes.Any],
+    args: tuple[ftypes.Any, ...],
+    kwargs: dict[str, ftypes.Any],
+    candidates: tuple[int, ...] = CANDIDATES,
+    sample_size: int = 1 << 20,
+    repeat: int = 3,
+) -> int:
+    """Finds the fastest chunk size for evaluate_chunked by timing it on a
+    sample of the arguments (their first sample_size elements or so).
+
+    Returns:
+        int: The candidate chunk size with the lowest best time.
+    """
+
+    _, slices = chunks(args, sample_size)
+    sample = _slice_args(args, slices[0])
+
+    best_time, best_size = float("inf"), candidates[0]
+    for chunk_size in candidates:
+        # the first run warms up any per-shape state, e.g. fused layouts
+        evaluate_chunked(run, sample, kwargs, chunk_size)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            evaluate_chunked(run, sample, kwargs, chunk_size)
+            elapsed = time.perf_counter() - start
+            if elapsed < best_time:
+                best_time, best_size = elapsed, chunk_size
+    return best_size
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import itertools
+import linecache
+import operator
+
+from . import ops
+from . import types as ftypes
+
+__all__ = ["generate_source", "compile_plan"]
+
+_counter = itertools.count()
+
+
+def _operator_expr(function: ftypes.GenericFunction, names: list[str]) -> str | None:
+    """Returns the infix (or prefix) expression of an operator from the
+    operator module applied to names, or None if function isn't one."""
+
+    op_name = getattr(function, "__name__", None)
+    if op_name not in ops.operator_symbols or getattr(operator, op_name) is not function:
+        return None
+
+    symbol = ops.operator_symbols[op_name]
+    if len(names) == 1 and op_name in ops.unary_symbols:
+        if symbol.isidentifier():
+            return f"{symbol}({names[0]})"
+        return f"{symbol}{names[0]}"
+    if len(names) == 2 and op_name in ops.binary_symbols:
+        return f"{names[0]} {symbol} {names[1]}"
+    return None
+
+
+def generate_source(plan) -> tuple[str, dict[str, ftypes.Any]]:
+    """Generates the source of a factory that builds a straight-line
+    Python function equivalent to plan.
+
+    Args:
+        plan (Plan): The evaluation plan to translate.
+
+    Returns:
+        tuple[str, dict[str, Any]]: The factory's source and the values
+        of its parameters, i.e. the plan's constants and callables.
+    """
+
+    computed = {step[0] for step in plan.steps}
+    params: dict[str, ftypes.Any] = {
+        f"v{slot}": value
+        for slot, value in enumerate(plan.template)
+        if slot not in computed
+    }
+
+    body = []
+    for slot, function, operands, dead in plan.steps:
+        if operands is None:
+            params[f"f{slot}"] = function
+            expr = f"f{slot}(*args, **kwargs)"
+        else:
+            names = [f"v{i}" for i in operands]
+            expr = _operator_expr(function, names)
+            if expr is None:
+                params[f"f{slot}"] = function
+                expr = f"f{slot}({', '.join(names)})"
+        body.append(f"v{slot} = {expr}")
+        if dead:
+            body.append(f"del {', '.join(f'v{i}' for i in dead)}")
+    body.append(f"return v{plan.output}")
+
+    lines = [f"def __factory__({', '.join(params)}):"]
+    lines.append("    def compiled(*args, **kwargs):")
+    lines.extend(f"        {line}" for line in body)
+    lines.append("    return compiled")
+    return "\n".join(lines) + "\n", params
+
+
+def compile_plan(plan, name: str = "compiled", doc: str | None = None):
+    """Compiles plan into a single generated Python function.
+
+    Each step of the plan becomes one line of straight-line code with
+    local variables holding intermediate values, and operators from the
+    operator module are inlined as their infix expressions.
+
+    Args:
+        plan (Plan): The evaluation plan to compile.
+        name (str, optional): The __name__ given to the function.
+        Defaults to 'compiled'.
+        doc (str | None, optional): The function's docstring.
+        Defaults to None.
+
+    Returns:
+        GenericFunction: A function taking the same arguments as the
+        expression the plan was built from.
+    """
+
+    source, params = generate_source(plan)
+    filename = f"<functionplus-compiled-{next(_counter)}>"
+
+    # registers the source so that tracebacks can show it
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    namespace: dict[str, ftypes.Any] = {}
+    exec(compile(source, filename, "exec"), namespace)  # pylint: disable=W0122
+    function = namespace["__factory__"](**params)
+    function.__name__ = function.__qualname__ = name
+    function.__doc__ = doc
+    return function
@@ -2,12 +2,60 @@ from abc import abstractmethod
 from functools import wraps
 import operator
 
-from numpy import full_like
-
-from . import ops
+from . import graph, ops, simplify
 from . import types as ftypes
 
 
+class FullLike:
+    """A function that returns a constant in the same shape as whatever
+    input it receives. Unlike a closure, it can be pickled.
+
+    The constant takes the dtype of the input (unless it has a dtype of
+    its own, or can't be converted to it, in which case it's an object).
+    Scalar inputs give a scalar, while array inputs give a read-only view
+    of the constant broadcast to the input's shape, which takes no memory
+    no matter how big the input is; use numpy.array on the result if a
+    writable array is needed.
+
+    NumPy is only imported once the function is first called.
+    """
+
+    def __init__(self, value: ftypes.Any) -> None:
+        self.value = value
+        self.__name__ = ops.get_funcname(value)
+        self._constants: dict[ftypes.Any, ftypes.Any] = {}
+
+    def constant(self, dtype: ftypes.Any) -> ftypes.Any:
+        """Returns the constant as a 0-dimensional array of dtype."""
+
+        import numpy as np  # pylint: disable=C0415
+
+        constant = self._constants.get(dtype)
+        if constant is None:
+            try:
+                constant = np.asarray(self.value, dtype=dtype)
+            except ValueError:
+                constant = np.empty((), dtype="object")
+                constant[()] = self.value
+            constant.setflags(write=False)
+            self._constants[dtype] = constant
+        return constant
+
+    def __call__(self, x: ftypes.Any) -> ftypes.Any:
+        import numpy as np  # pylint: disable=C0415
+
+        value = self.value
+        dtype = getattr(value, "dtype", getattr(x, "dtype", None))
+        if dtype is None:
+            # numpy.full_like's default, the dtype of x as an array
+            dtype = np.asarray(x).dtype
+        constant = self.constant(dtype)
+        shape = np.shape(x)
+        if not shape and not constant.ndim:
+            return constant.item()
+        return np.broadcast_to(constant, shape)
+
+
 class DunderOperator:
     def __init__(
         self, name: str, op: ftypes.Operator | None = None, is_rop: bool = False
@@ -21,27 +69,38 @@ class DunderOperator:
 
         self.symbol = ops.operator_symbols[self._op.__name__]
         self.is_rop = is_rop
+        # the implementations built by self.op, one per owner class
+        self._ops: dict[type, ftypes.GenericFunction] = {}
 
         if is_rop:
             if not name.startswith("__") and name.endswith("__"):
                 raise ValueError(f"Method {self._op} is not a dunder method")
             self.name = name[:2] + "r" + name[2:]
-            self.doc = ops.operator_doc(self._op, "other", "self")
         else:
             self.name = name
-            self.doc = ops.operator_doc(self._op)
+
+    @property
+    def doc(self) -> str:
+        """The docstring of the operator's implementation, which is only
+        made when it's first built (see op_for)."""
+
+        if getattr(self, "is_rop", False):
+            return ops.operator_doc(self._op, "other", "self")
+        return ops.operator_doc(self._op)
 
     @abstractmethod
     def op(self, cls: type) -> ftypes.GenericFunction: ...
 
-    @staticmethod
-    def get_components(instance: object):
-        if not callable(instance):
-            return set()
-        return getattr(instance, "components", set([instance]))
+    def op_for(self, cls: type) -> ftypes.GenericFunction:
+        """Returns self.op(cls), building it only on first use."""
+
+        try:
+            return self._ops[cls]
+        except KeyError:
+            return self._ops.setdefault(cls, self.op(cls))
 
     def __get__(self, instance: object, owner: type):
-        return self.op(owner).__get__(instance, owner)
+        return self.op_for(owner).__get__(instance, owner)
 
 
 class DunderUnaryOperator(DunderOperator):
@@ -52,74 +111,26 @@ class DunderUnaryOperator(DunderOperator):
     def op(self, cls: type):
         @wraps(self._op, assigned=("__name__", "__doc__"))
         def __op__(fself):
-            def wrapper(*fargs, **fkwargs):
-                return self._op(fself(*fargs, **fkwargs))
-
-            # updates the operator's name and docstring appropriately
-            f_name = ops.get_funcname(fself)
-
-            new_name = f"({self.symbol} {f_name})"
-            wrapper.__name__ = new_name
-            wrapper.__doc__ = f"Computes {new_name}(...)."
-
-            h = cls(wrapper)
-            h.components = self.get_components(fself)
-            return h
+            return cls(graph.UnaryNode(self._op, graph.as_node(fself)))
 
         __op__.__doc__ = self.doc
         return __op__
 
 
 class DunderBinaryOperator(DunderOperator):
-    @staticmethod
-    def binary_calls(
-        f: ftypes.GenericFunction | ftypes.Any,
-        g: ftypes.GenericFunction | ftypes.Any,
-        *args: ftypes.Any,
-        **kwargs: ftypes.Any,
-    ) -> tuple[ftypes.Any, ftypes.Any]:
-        """Takes two input objects and calls with them with the
-        arguments passed in alongside them, if possible.
-
-        Args:
-            f (GenericFunction | Any): The first object to be called if possible.
-            g (GenericFunction | Any): The second object to be called if possible.
-            args (Any): The positional arguments to pass into f and g.
-            kwargs (Any): The keyword arguments to pass into f and g.
-
-        Returns:
-            tuple[Any, Any]: Any relevant function outputs.
-        """
-
-        cf, cg = callable(f), callable(g)
-        if cf and cg:
-            return f(*args, **kwargs), g(*args, **kwargs)
-        if cf:
-            return f(*args, **kwargs), g
-        if cg:
-            return f, g(*args, **kwargs)
-        return f, g
-
     def op(self, cls: type):
         @wraps(self._op, assigned=("__name__", "__doc__"))
         def __op__(fself, fother):
-            def wrapper(*fargs, **fkwargs):
-                if self.is_rop:
-                    calls = self.binary_calls(fother, fself, *fargs, **fkwargs)
-                calls = self.binary_calls(fself, fother, *fargs, **fkwargs)
-                return self._op(*calls)
-
-            # updates the wrapper's name and docstring appropriately
-            f_name = ops.get_funcname(fself)
-            g_name = ops.get_funcname(fother)
-
-            new_name = f"({f_name} {self.symbol} {g_name})"
-            wrapper.__name__ = new_name
-            wrapper.__doc__ = f"Computes {new_name}(...)."
+            # reflected operators have the other operand on the left
+            if self.is_rop:
+                fleft, fright = fother, fself
+            else:
+                fleft, fright = fself, fother
 
-            h = cls(wrapper)
-            h.components = self.get_components(fself) | self.get_components(fother)
-            return h
+            node = simplify.fold_binary(
+                self._op, graph.as_node(fleft), graph.as_node(fright)
+            )
+            return cls(node)
 
         __op__.__doc__ = self.doc
         return __op__
@@ -129,6 +140,7 @@ class CompositionOperator(DunderOperator):
     def __init__(self, is_rop: bool = False) -> None:  # pylint: disable=W0231
         self.is_rop = is_rop
         self.name = "__rmatmul__" if self.is_rop else "__matmul__"
+        self._ops: dict[type, ftypes.GenericFunction] = {}
 
     def op(self, cls: type):
         return self.rop(cls) if self.is_rop else self.lop(cls)
@@ -137,33 +149,21 @@ class CompositionOperator(DunderOperator):
         def __matmul__(fself, fother: ftypes.GenericFunction | ftypes.Any):
             """Composes the function with another Function."""
 
-            f = getattr(fself, "function", fself)
-            g = getattr(fother, "function", fother)
-
             # if g is a constant, treat
             # f @ g as a function call f(g)
-            if not callable(g):
-                return f(g)
-
-            f_name = ops.get_funcname(fself)
-            g_name = ops.get_funcname(fother)
+            if not callable(fother):
+                return fself(fother)
 
-            # otherwise, create a wrapper that
+            # otherwise, create a node that
             # composes f and g
-            def wrapper(*args, **kwargs):
-                return f(g(*args, **kwargs))
-
-            new_name = f"{g_name}; {f_name}"
-            wrapper.__name__ = new_name
-            wrapper.__doc__ = f"Applies the functions {new_name} from left to right."
-
-            h = cls(wrapper)
-            h.components = self.get_components(fself) | self.get_components(fother)
-            return h
+            node = graph.CompositionNode(graph.as_node(fself), graph.as_node(fother))
+            return cls(node)
 
         return __matmul__
 
     def rop(self, cls: type):
+        lop = self.lop(cls)
+
         def __rmatmul__(fself, fother: ftypes.Self | ftypes.Any):
             """Composes another Function with this function."""
 
@@ -171,20 +171,10 @@ class CompositionOperator(DunderOperator):
                 # if other is a constant, treat it as a function
                 # that returns that constant in the same shape as
                 # whatever input it receives
-                def other_func(x):
-                    dtype = getattr(fother, "dtype", getattr(x, "dtype", None))
-                    try:
-                        out = full_like(x, fother, dtype=dtype)
-                    except ValueError:
-                        out = full_like(x, fother, dtype="object")
-                    if not out.ndim:
-                        return out.item()
-                    return out
-
-                fother_func = cls(other_func, ops.get_funcname(fother))
+                fother_func = cls(FullLike(fother), ops.get_funcname(fother))
             else:
                 fother_func = fother
 
-            return self.lop(cls)(fself=fother_func, fother=fself)
+            return lop(fself=fother_func, fother=fself)
 
         return __rmatmul__
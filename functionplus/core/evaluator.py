@@ -0,0 +1,468 @@
+from __future__ import annotations
+
+from functools import partial
+from numbers import Integral, Real
+from typing import TYPE_CHECKING
+
+from . import graph
+from . import types as ftypes
+
+if TYPE_CHECKING:
+    from . import buffers
+
+__all__ = ["Plan", "get_plan", "is_async", "evaluate", "evaluate_async", "iterate"]
+
+# the context of nodes evaluated with the expression's own arguments,
+# as opposed to the output of an inner composed function
+ARGS = -1
+
+# how each step of a plan is called by the interpreter: with the
+# expression's arguments, one operand, two operands, an operand and a
+# constant (f op c), a constant and an operand (c op f), or any number
+# of operands
+CALL_ARGS, CALL_ONE, CALL_TWO, CALL_CONST_RIGHT, CALL_CONST_LEFT, CALL_MANY = range(6)
+
+
+def constant_key(value: ftypes.Any) -> tuple[ftypes.Any, ...]:
+    """Returns a hashable key under which equal constants compare equal.
+
+    Floats are keyed by their exact hex representation so that 0.0
+    and -0.0 stay distinct, and unhashable values (e.g. arrays) are
+    only ever equal to themselves.
+    """
+
+    if isinstance(value, Real) and not isinstance(value, Integral):
+        return (type(value), float(value).hex())
+    try:
+        hash(value)
+    except TypeError:
+        return ("id", id(value))
+    return (type(value), value)
+
+
+class Plan:
+    """A flattened, topologically ordered evaluation of an expression graph.
+
+    Every distinct subexpression is assigned a single slot, so subgraphs
+    that are shared by identity or that are structurally identical (the
+    same callables and constants combined with the same operators) are
+    computed only once per call. Note that this means a leaf is called
+    once per distinct input even if it has side effects.
+
+    Attributes:
+        steps (list[tuple[int, GenericFunction, tuple[int, ...] | None,
+        tuple[int, ...]]]): The (slot, function, operand slots, dead slots)
+        of each call, in evaluation order. Operand slots of None mean the
+        function is called with the expression's own arguments, and dead
+        slots are released once the step is done with them.
+        template (list[Any]): The initial slot values, holding constants.
+        output (int): The slot holding the expression's value.
+        calls (list[tuple[int, int, GenericFunction, Any, Any, tuple[int,
+        ...]]]): The steps as the interpreter runs them: the (slot, kind,
+        function, a, b, dead slots) of each, where kind is one of the CALL_
+        constants and a and b are operand slots or constant values (see
+        specialize).
+        compiled (GenericFunction | None): The plan compiled into a
+        single Python function, once compile has been called.
+        fused (FusedPlan | None): The plan's buffered evaluator for NumPy
+        arrays, once fuse has been called.
+        chunk_size (int | None): The chunk size found by calibrating
+        chunked evaluation of the plan, if it has been.
+        is_async (bool): Whether any leaf is a coroutine function, in
+        which case the plan is evaluated by evaluate_async.
+    """
+
+    compiled = None
+    fused = None
+    chunk_size = None
+    is_async = False
+
+    def __init__(self, root: graph.Node) -> None:
+        self.steps: list = []
+        self.template: list[ftypes.Any] = []
+        self._keys: dict[tuple[ftypes.Any, ...], int] = {}
+        self._constants: set[int] = set()
+        self._seen: dict[tuple[int, int], int] = {}
+        self._nodes: list[graph.Node] = []
+
+        self.output = self._add(root, ARGS)
+        self._release()
+        self.calls = [self.specialize(step) for step in self.steps]
+
+        del self._keys, self._constants, self._seen, self._nodes
+
+    def __len__(self) -> int:
+        return len(self.template)
+
+    def _slot(self, key: tuple[ftypes.Any, ...], value: ftypes.Any = None) -> int:
+        slot = self._keys.get(key)
+        if slot is None:
+            slot = self._keys[key] = len(self.template)
+            self.template.append(value)
+        return slot
+
+    def _add(self, root: graph.Node, root_context: int) -> int:
+        """Adds the steps computing root (and everything it depends on)
+        in the given context, returning the slot of its value.
+
+        The graph is walked in post-order with an explicit stack rather
+        than by recursion, so arbitrarily deep graphs can be planned.
+        """
+
+        seen = self._seen
+        stack = [(root, root_context)]
+        while stack:
+            node, context = stack[-1]
+            if (id(node), context) in seen:
+                stack.pop()
+                continue
+
+            if isinstance(node, graph.Constant):
+                slot = self._constant(node.value)
+            elif isinstance(node, graph.Leaf):
+                function = node.function
+                operands = None if context == ARGS else (context,)
+                slot = self._step(("leaf", id(function), context), function, operands)
+                self.is_async = self.is_async or is_async(node)
+            elif isinstance(node, graph.IterationNode):
+                self.is_async = self.is_async or is_async(node.base)
+                function = iterate(node)
+                operands = None if context == ARGS else (context,)
+                key = ("iter", id(node.base), node.n, context)
+                slot = self._step(key, function, operands)
+            elif isinstance(node, graph.CompositionNode):
+                # the outer function's context is the inner function's slot
+                inner = seen.get((id(node.inner), context))
+                if inner is None:
+                    stack.append((node.inner, context))
+                    continue
+                slot = seen.get((id(node.outer), inner))
+                if slot is None:
+                    stack.append((node.outer, inner))
+                    continue
+            else:
+                pending = [
+                    (child, context)
+                    for child in node.children
+                    if (id(child), context) not in seen
+                ]
+                if pending:
+                    stack.extend(reversed(pending))
+                    continue
+                operands = tuple(seen[(id(child), context)] for child in node.children)
+                slot = self._fold(node.op, operands)
+                if slot is None:
+                    slot = self._step(("op", node.op, *operands), node.op, operands)
+
+            stack.pop()
+            # keeps node alive so that its id can't be reused while planning
+            self._nodes.append(node)
+            seen[(id(node), context)] = slot
+
+        return seen[(id(root), root_context)]
+
+    def _constant(self, value: ftypes.Any) -> int:
+        slot = self._slot(("const", *constant_key(value)), value)
+        self._constants.add(slot)
+        return slot
+
+    def _fold(self, op: ftypes.Operator, operands: tuple[int, ...]) -> int | None:
+        """Computes op ahead of time if all its operands are constants,
+        returning the slot of the result (or None if it can't be)."""
+
+        if not self._constants.issuperset(operands):
+            return None
+        try:
+            value = op(*[self.template[i] for i in operands])
+        except Exception:  # pylint: disable=W0718
+            # leaves the error to be raised when the plan is called
+            return None
+        return self._constant(value)
+
+    def _step(
+        self,
+        key: tuple[ftypes.Any, ...],
+        function: ftypes.GenericFunction,
+        operands: tuple[int, ...] | None,
+    ) -> int:
+        n_slots = len(self.template)
+        slot = self._slot(key)
+        if slot == n_slots:
+            self.steps.append((slot, function, operands, ()))
+        return slot
+
+    def _release(self) -> None:
+        """Marks each computed slot as dead after the last step using it."""
+
+        last_use: dict[int, int] = {}
+        for i, (_, _, operands, _) in enumerate(self.steps):
+            for operand in operands or ():
+                last_use[operand] = i
+
+        computed = {step[0] for step in self.steps}
+        dead: dict[int, list[int]] = {}
+        for operand, i in last_use.items():
+            if operand in computed and operand != self.output:
+                dead.setdefault(i, []).append(operand)
+
+        for i, slots in dead.items():
+            slot, function, operands, _ = self.steps[i]
+            self.steps[i] = (slot, function, operands, tuple(slots))
+
+    def specialize(self, step: tuple[ftypes.Any, ...]) -> tuple[ftypes.Any, ...]:
+        """Picks how the interpreter calls a step, given how many operands
+        it has and which of them are constants, so that constant operands
+        are passed directly rather than read from their slots and no
+        argument list is built for steps with one or two operands.
+
+        Returns:
+            tuple[int, int, GenericFunction, Any, Any, tuple[int, ...]]:
+            The step's slot, kind, function, a, b and dead slots.
+        """
+
+        slot, function, operands, dead = step
+        constants = self._constants
+        if operands is None:
+            return (slot, CALL_ARGS, function, None, None, dead)
+        if len(operands) == 1:
+            return (slot, CALL_ONE, function, operands[0], None, dead)
+        if len(operands) == 2:
+            a, b = operands
+            if b in constants and a not in constants:
+                return (slot, CALL_CONST_RIGHT, function, a, self.template[b], dead)
+            if a in constants and b not in constants:
+                return (slot, CALL_CONST_LEFT, function, self.template[a], b, dead)
+            return (slot, CALL_TWO, function, a, b, dead)
+        return (slot, CALL_MANY, function, operands, None, dead)
+
+    def compile(self, name: str = "compiled", doc: str | None = None):
+        """Compiles the plan into straight-line Python code (see
+        codegen.compile_plan), which evaluate uses from then on."""
+
+        from . import codegen  # pylint: disable=C0415
+
+        if self.compiled is None:
+            self.compiled = codegen.compile_plan(self, name, doc)
+        return self.compiled
+
+    def fuse(self) -> buffers.FusedPlan:
+        """Returns the plan's buffered evaluator for NumPy arrays (see
+        buffers.FusedPlan), creating it on first use."""
+
+        from . import buffers  # pylint: disable=C0415
+
+        if self.fused is None:
+            self.fused = buffers.FusedPlan(self)
+        return self.fused
+
+    def __call__(
+        self, args: tuple[ftypes.Any, ...], kwargs: dict[str, ftypes.Any]
+    ) -> ftypes.Any:
+        values = self.template.copy()
+        for slot, kind, function, a, b, dead in self.calls:
+            if kind == CALL_CONST_RIGHT:
+                values[slot] = function(values[a], b)
+            elif kind == CALL_TWO:
+                values[slot] = function(values[a], values[b])
+            elif kind == CALL_CONST_LEFT:
+                values[slot] = function(a, values[b])
+            elif kind == CALL_ONE:
+                values[slot] = function(values[a])
+            elif kind == CALL_ARGS:
+                values[slot] = function(*args, **kwargs)
+            else:
+                values[slot] = function(*[values[i] for i in a])
+            if dead:
+                for i in dead:
+                    values[i] = None
+        return values[self.output]
+
+
+def get_plan(node: graph.Node) -> Plan:
+    """Returns the (cached) evaluation plan of the graph rooted at node."""
+
+    plan = node.plan
+    if plan is None:
+        plan = node.plan = Plan(node)
+    return plan
+
+
+def _is_async_callable(function: ftypes.GenericFunction) -> bool:
+    """Checks if calling function returns a coroutine: if it's a coroutine
+    function, an object whose __call__ method is one, a wrapper reporting
+    it with an is_async attribute (as Functions do), or a partial of any
+    of these."""
+
+    from inspect import iscoroutinefunction, isroutine  # pylint: disable=C0415
+
+    while isinstance(function, partial):
+        function = function.func
+    if isinstance(function, graph.Node):
+        return is_async(function)
+    flag = getattr(function, "is_async", None)
+    if isinstance(flag, bool):
+        return flag
+    return iscoroutinefunction(function) or (
+        not isroutine(function)
+        and iscoroutinefunction(getattr(function, "__call__", None))
+    )
+
+
+def is_async(node: graph.Node) -> bool:
+    """Checks if the expression graph rooted at node has an asynchronous
+    leaf (see _is_async_callable), making the expression itself
+    asynchronous."""
+
+    if isinstance(node, graph.Leaf):
+        return _is_async_callable(node.function)
+    if isinstance(node, graph.Constant):
+        return False
+    return get_plan(node).is_async
+
+
+def evaluate(
+    node: graph.Node, args: tuple[ftypes.Any, ...], kwargs: dict[str, ftypes.Any]
+) -> ftypes.Any:
+    """Evaluates the expression graph rooted at node.
+
+    Args:
+        node (Node): The root of the expression graph.
+        args (tuple[Any, ...]): The positional arguments passed to each leaf.
+        kwargs (dict[str, Any]): The keyword arguments passed to each leaf.
+
+    Returns:
+        Any: The value of the expression, or a coroutine computing it if
+        the expression is asynchronous (see evaluate_async).
+    """
+
+    if isinstance(node, graph.Leaf):
+        return node.function(*args, **kwargs)
+    plan = get_plan(node)
+    if plan.is_async:
+        return evaluate_async(node, args, kwargs)
+    if plan.compiled is not None:
+        return plan.compiled(*args, **kwargs)
+    return plan(args, kwargs)
+
+
+async def _resolve(
+    function: ftypes.GenericFunction, inputs: list[ftypes.Any]
+) -> ftypes.Any:
+    """Calls function once all of its inputs that are still being
+    computed are ready, awaiting the result if it's awaitable."""
+
+    import asyncio  # pylint: disable=C0415
+    import inspect  # pylint: disable=C0415
+
+    pending = [value for value in inputs if isinstance(value, asyncio.Future)]
+    if pending:
+        await asyncio.gather(*pending)
+        inputs = [
+            value.result() if isinstance(value, asyncio.Future) else value
+            for value in inputs
+        ]
+    value = function(*inputs)
+    if inspect.isawaitable(value):
+        value = await value
+    return value
+
+
+async def _iterate_async(
+    node: graph.IterationNode, *args: ftypes.Any, **kwargs: ftypes.Any
+) -> ftypes.Any:
+    value = await evaluate_async(node.base, args, kwargs)
+    for _ in range(node.n - 1):
+        value = await evaluate_async(node.base, (value,), {})
+    return value
+
+
+async def evaluate_async(
+    node: graph.Node, args: tuple[ftypes.Any, ...], kwargs: dict[str, ftypes.Any]
+) -> ftypes.Any:
+    """Evaluates the expression graph rooted at node, awaiting the values
+    of leaves that return awaitables (e.g. coroutine functions).
+
+    Every step of the plan whose value is awaitable, or whose operands are
+    still being computed, runs as a separate task, so independent
+    subexpressions (e.g. both operands of a binary operator) are awaited
+    concurrently, while composed functions are applied in order. Steps
+    whose operands are all ready are computed right away, as usual. If
+    any step raises, the tasks still running are cancelled.
+
+    Args:
+        node (Node): The root of the expression graph.
+        args (tuple[Any, ...]): The positional arguments passed to each leaf.
+        kwargs (dict[str, Any]): The keyword arguments passed to each leaf.
+
+    Returns:
+        Any: The value of the expression.
+    """
+
+    import asyncio  # pylint: disable=C0415
+    import inspect  # pylint: disable=C0415
+
+    if isinstance(node, graph.Leaf):
+        value = node.function(*args, **kwargs)
+        if inspect.isawaitable(value):
+            value = await value
+        return value
+
+    plan = get_plan(node)
+    values = plan.template.copy()
+    tasks: list[asyncio.Future] = []
+    try:
+        for slot, function, operands, dead in plan.steps:
+            iterated = getattr(function, "iterates", None)
+            if iterated is not None:
+                function = partial(_iterate_async, iterated)
+            if operands is None:
+                value = function(*args, **kwargs)
+            else:
+                inputs = [values[i] for i in operands]
+                if any(isinstance(value, asyncio.Future) for value in inputs):
+                    value = _resolve(function, inputs)
+                else:
+                    value = function(*inputs)
+
+            if inspect.isawaitable(value):
+                value = asyncio.ensure_future(value)
+                tasks.append(value)
+            values[slot] = value
+            for i in dead:
+                values[i] = None
+
+        value = values[plan.output]
+        if isinstance(value, asyncio.Future):
+            value = await value
+        return value
+    except BaseException:
+        for task in tasks:
+            if not task.cancel() and not task.cancelled():
+                # marks the exceptions of other failed steps as retrieved
+                task.exception()
+        raise
+
+
+def iterate(node: graph.IterationNode) -> ftypes.GenericFunction:
+    """Returns a function that evaluates node by applying its base
+    node.n times in a loop."""
+
+    base, n = node.base, node.n
+
+    def iterated(*args, **kwargs):
+        value = evaluate(base, args, kwargs)
+
+        # resolves how base is called once rather than on every iteration
+        if isinstance(base, graph.Leaf):
+            apply = base.function
+        else:
+            plan = get_plan(base)
+            apply = plan.compiled or (lambda v: plan((v,), {}))
+
+        for _ in range(n - 1):
+            value = apply(value)
+        return value
+
+    # lets evaluate_async apply an asynchronous base in order
+    iterated.iterates = node
+    return iterated
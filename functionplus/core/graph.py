@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import copy
+
+from . import ops
+from . import types as ftypes
+
+__all__ = [
+    "Node",
+    "Leaf",
+    "Constant",
+    "OperatorNode",
+    "UnaryNode",
+    "BinaryNode",
+    "CompositionNode",
+    "IterationNode",
+    "as_node",
+    "walk",
+    "postorder",
+    "transform",
+    "render",
+    "flatten",
+    "unflatten",
+]
+
+
+class Node:
+    """Base class for the nodes of a Function's expression graph.
+
+    Nodes are immutable once built and may be shared between any
+    number of expressions, so a graph is in general a DAG rather
+    than a tree. They store their attributes in __slots__, since
+    expressions may be made of millions of them.
+
+    Attributes:
+        children (tuple[Node, ...]): The nodes this node depends on.
+        label (str | None): The name the node is rendered as, if it's
+        been explicitly named.
+        plan (Plan | None): The node's evaluation plan, built by the
+        evaluator on first use.
+    """
+
+    __slots__ = ("label", "plan")
+
+    children: tuple[Node, ...] = ()
+
+    def __init__(self, label: str | None = None) -> None:
+        self.label = label
+        self.plan = None
+
+    def __call__(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        """Evaluates the graph rooted at this node."""
+
+        from .evaluator import evaluate  # pylint: disable=C0415
+
+        return evaluate(self, args, kwargs)
+
+    def with_children(self, *children: Node) -> Node:
+        """Returns a copy of this node with its children replaced,
+        or the node itself if they're unchanged."""
+
+        if all(new is old for new, old in zip(children, self.children)):
+            return self
+        node = self._rebuild(*children)
+        if self.label is not None:
+            node.label = self.label
+        return node
+
+    def _rebuild(self, *children: Node) -> Node:
+        return self
+
+    def labeled(self, label: str | None) -> Node:
+        """Returns a copy of this node named label."""
+
+        node = copy.copy(self)
+        node.label = label
+        node.plan = None
+        return node
+
+    def format_name(self, *names: str) -> str:
+        """Formats the node's name given the names of its children."""
+
+        return self.__class__.__name__
+
+    def __copy__(self) -> Node:
+        node = self.__class__.__new__(self.__class__)
+        _restore(node, _state(self))
+        return node
+
+    def __reduce__(self) -> tuple[ftypes.Any, ...]:
+        # pickles the whole graph as a flat list, so that deep graphs
+        # don't exhaust the recursion limit and shared nodes stay shared
+        return unflatten, (flatten(self),)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}>"
+
+
+class Leaf(Node):
+    """A node that calls a wrapped callable with the expression's arguments.
+
+    Attributes:
+        function (GenericFunction): The callable being wrapped.
+    """
+
+    __slots__ = ("function",)
+
+    def __init__(
+        self, function: ftypes.GenericFunction, label: str | None = None
+    ) -> None:
+        super().__init__(label)
+        self.function = function
+
+    def format_name(self, *names: str) -> str:
+        return ops.get_funcname(self.function)
+
+    def __repr__(self) -> str:
+        return f"<Leaf {ops.get_funcname(self.function)}>"
+
+
+class Constant(Node):
+    """A node that evaluates to a fixed value regardless of its arguments.
+
+    Attributes:
+        value (Any): The constant value.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: ftypes.Any) -> None:
+        super().__init__()
+        self.value = value
+
+    def format_name(self, *names: str) -> str:
+        return ops.get_funcname(self.value)
+
+    def __repr__(self) -> str:
+        return f"<Constant {self.value!r}>"
+
+
+class OperatorNode(Node):
+    """A node that applies an operator from the operator module to
+    the values of its children.
+
+    Attributes:
+        op (Operator): The operator being applied.
+        children (tuple[Node, ...]): The operands, in order.
+    """
+
+    __slots__ = ("op", "children")
+
+    def __init__(self, op: ftypes.Operator, *children: Node) -> None:
+        super().__init__()
+        self.op = op
+        self.children = children
+
+    @property
+    def symbol(self) -> str:
+        """The operator's symbol, as given by ops.operator_symbols."""
+
+        return ops.operator_symbols[self.op.__name__]
+
+    def _rebuild(self, *children: Node) -> Node:
+        return self.__class__(self.op, *children)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.symbol}>"
+
+
+class UnaryNode(OperatorNode):
+    """An OperatorNode with a single operand."""
+
+    __slots__ = ()
+
+    def __init__(self, op: ftypes.UnaryOperator, operand: Node) -> None:
+        super().__init__(op, operand)
+
+    def format_name(self, *names: str) -> str:
+        return f"({self.symbol} {names[0]})"
+
+    @property
+    def operand(self) -> Node:
+        """The node the operator is applied to."""
+
+        return self.children[0]
+
+
+class BinaryNode(OperatorNode):
+    """An OperatorNode with a left and right operand."""
+
+    __slots__ = ()
+
+    def __init__(self, op: ftypes.BinaryOperator, left: Node, right: Node) -> None:
+        super().__init__(op, left, right)
+
+    def format_name(self, *names: str) -> str:
+        return f"({names[0]} {self.symbol} {names[1]})"
+
+    @property
+    def left(self) -> Node:
+        """The left-hand operand."""
+
+        return self.children[0]
+
+    @property
+    def right(self) -> Node:
+        """The right-hand operand."""
+
+        return self.children[1]
+
+
+class CompositionNode(Node):
+    """A node that passes the value of inner to outer, i.e. outer(inner(...)).
+
+    Attributes:
+        outer (Node): The function applied last.
+        inner (Node): The function applied first.
+    """
+
+    __slots__ = ("outer", "inner", "children")
+
+    def __init__(self, outer: Node, inner: Node) -> None:
+        super().__init__()
+        self.outer = outer
+        self.inner = inner
+        self.children = (outer, inner)
+
+    def _rebuild(self, *children: Node) -> Node:
+        return CompositionNode(*children)
+
+    def format_name(self, *names: str) -> str:
+        outer, inner = names
+        return f"{inner}; {outer}"
+
+
+class IterationNode(Node):
+    """A node that applies base to its own output n times, i.e.
+    base(base(...base(...))).
+
+    Attributes:
+        base (Node): The function being iterated.
+        n (int): How many times base is applied. Must be positive.
+    """
+
+    __slots__ = ("base", "n", "children")
+
+    def __init__(self, base: Node, n: int) -> None:
+        if n < 1:
+            raise ValueError("n must be a positive integer")
+        super().__init__()
+        self.base = base
+        self.n = n
+        self.children = (base,)
+
+    def _rebuild(self, *children: Node) -> Node:
+        return IterationNode(children[0], self.n)
+
+    def format_name(self, *names: str) -> str:
+        return f"{names[0]}^{self.n}"
+
+    def __repr__(self) -> str:
+        return f"<IterationNode n={self.n}>"
+
+
+def _state(node: Node) -> dict[str, ftypes.Any]:
+    """Returns the attributes of node, whether they're stored in slots
+    or (for subclasses without __slots__) in its __dict__."""
+
+    state = dict(getattr(node, "__dict__", ()))
+    for cls in type(node).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if hasattr(node, name):
+                state[name] = getattr(node, name)
+    return state
+
+
+def _restore(node: Node, state: dict[str, ftypes.Any]) -> None:
+    for name, value in state.items():
+        setattr(node, name, value)
+
+
+def as_node(obj: ftypes.Any) -> Node:
+    """Converts obj into a node of an expression graph.
+
+    Function objects contribute their own graph, other callables
+    become Leaf nodes and anything else becomes a Constant.
+    """
+
+    if isinstance(obj, Node):
+        return obj
+    node = getattr(obj, "node", None)
+    if isinstance(node, Node):
+        return node
+    if callable(obj):
+        return Leaf(obj)
+    return Constant(obj)
+
+
+def walk(root: Node) -> ftypes.Iterator[Node]:
+    """Yields each distinct node of the graph rooted at root once,
+    parents before their children."""
+
+    seen = {id(root)}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in reversed(node.children):
+            if id(child) not in seen:
+                seen.add(id(child))
+                stack.append(child)
+
+
+def postorder(
+    root: Node,
+    children: ftypes.Callable[[Node], tuple[Node, ...]] | None = None,
+) -> ftypes.Iterator[Node]:
+    """Yields each distinct node of the graph rooted at root once,
+    children before their parents and root last.
+
+    The graph is walked with an explicit stack, so it may be arbitrarily
+    deep, and every node yielded is kept alive until the walk ends, so
+    callers may key the nodes by id meanwhile.
+
+    Args:
+        root (Node): The root of the graph.
+        children (Callable[[Node], tuple[Node, ...]] | None, optional):
+        Gives the children of each node to visit before it. Defaults to
+        None, meaning all of them.
+    """
+
+    done: set[int] = set()
+    # keeps the nodes alive so that their ids can't be reused
+    visited: list[Node] = []
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if id(node) in done:
+            stack.pop()
+            continue
+
+        below = node.children if children is None else children(node)
+        pending = [child for child in below if id(child) not in done]
+        if pending:
+            stack.extend(reversed(pending))
+            continue
+
+        stack.pop()
+        done.add(id(node))
+        visited.append(node)
+        yield node
+
+
+def transform(root: Node, function: ftypes.Callable[[Node], Node]) -> Node:
+    """Rebuilds the graph rooted at root from the bottom up.
+
+    Each node has its children replaced by their transformed versions
+    and is then passed to function, whose output replaces it. Nodes
+    shared within the graph are only transformed once, and the graph
+    is walked with postorder so it may be arbitrarily deep.
+
+    Args:
+        root (Node): The root of the graph to transform.
+        function (Callable[[Node], Node]): The transformation to apply.
+
+    Returns:
+        Node: The root of the transformed graph.
+    """
+
+    done: dict[int, Node] = {}
+    for node in postorder(root):
+        children = [done[id(child)] for child in node.children]
+        done[id(node)] = function(node.with_children(*children))
+    return done[id(root)]
+
+
+def render(root: Node, max_length: int | None = None) -> str:
+    """Renders the name of the expression graph rooted at root.
+
+    Labeled nodes are rendered as their label, and all other nodes are
+    formatted from the names of their children (see Node.format_name).
+
+    Args:
+        root (Node): The root of the graph.
+        max_length (int | None, optional): If given, the name of every
+        node (including the root) longer than this is cut short and ended
+        with '...', which bounds the cost of rendering huge graphs.
+        Defaults to None.
+
+    Returns:
+        str: The rendered name.
+    """
+
+    def unnamed_children(node: Node) -> tuple[Node, ...]:
+        # the children of labeled nodes don't need names
+        return node.children if node.label is None else ()
+
+    # how many parents still need each node's name, which is dropped
+    # once they've all used it so that only the names of the nodes
+    # waiting on a parent are kept at once
+    nodes = list(postorder(root, unnamed_children))
+    uses: dict[int, int] = {}
+    for node in nodes:
+        for child in unnamed_children(node):
+            uses[id(child)] = uses.get(id(child), 0) + 1
+
+    names: dict[int, str] = {}
+    for node in nodes:
+        if node.label is None:
+            name = node.format_name(*[names[id(child)] for child in node.children])
+            for child in node.children:
+                uses[id(child)] -= 1
+                if not uses[id(child)]:
+                    del names[id(child)]
+        else:
+            name = node.label
+
+        if max_length is not None and len(name) > max_length:
+            name = name[: max(max_length - 3, 0)] + "..."
+        names[id(node)] = name
+
+    return names[id(root)]
+
+
+def flatten(
+    root: Node,
+) -> list[tuple[type[Node], dict[str, ftypes.Any], tuple[int, ...]]]:
+    """Flattens the graph rooted at root into a list of records, children
+    before their parents and the root last, from which unflatten rebuilds
+    an equivalent graph.
+
+    Each record holds a node's class, its attributes (other than its
+    children and cached plan) and the indices of its children's records.
+    Callables and constants are kept as they are, so pickling the records
+    pickles leaf functions by reference and constants by value.
+
+    Returns:
+        list[tuple[type[Node], dict[str, Any], tuple[int, ...]]]: The records.
+    """
+
+    records: list[tuple[type[Node], dict[str, ftypes.Any], tuple[int, ...]]] = []
+    index: dict[int, int] = {}
+    for node in postorder(root):
+        fields = {
+            name: value
+            for name, value in _state(node).items()
+            if name not in ("children", "plan") and not isinstance(value, Node)
+        }
+        children = tuple(index[id(child)] for child in node.children)
+        index[id(node)] = len(records)
+        records.append((node.__class__, fields, children))
+
+    return records
+
+
+def unflatten(
+    records: list[tuple[type[Node], dict[str, ftypes.Any], tuple[int, ...]]],
+) -> Node:
+    """Rebuilds a graph flattened by flatten, returning its root."""
+
+    nodes: list[Node] = []
+    for cls, fields, children in records:
+        node = cls.__new__(cls)
+        _restore(node, fields)
+        node.plan = None
+        if children:
+            node = node._rebuild(*[nodes[i] for i in children])
+            if "label" in fields:
+                node.label = fields["label"]
+        nodes.append(node)
+    return nodes[-1]
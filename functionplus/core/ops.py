@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+import operator
+
 from . import types as ftypes
 
-__all__ = ["operator_symbols", "get_funcname", "operator_doc"]
+__all__ = [
+    "operator_symbols",
+    "unary_methods",
+    "binary_methods",
+    "identity",
+    "get_funcname",
+    "operator_doc",
+]
 
 unary_symbols = {
     "abs": "abs",
@@ -31,6 +40,62 @@ binary_symbols = {
 
 operator_symbols = {**unary_symbols, **binary_symbols}
 
+# the operator methods Function gets for each operator above: a dunder
+# method (e.g. __add__) and one named after the operator (e.g. add)
+unary_methods = (
+    ("__abs__", operator.abs),
+    ("__neg__", operator.neg),
+    ("__pos__", operator.pos),
+    ("abs", operator.abs),
+    ("neg", operator.neg),
+    ("pos", operator.pos),
+)
+
+# as above, along with whether the dunder method also has a reflected
+# version (e.g. __radd__), as it does for the operators int reflects;
+# these include __rand__ and __rxor__, which the check against float
+# this table replaced missed (it only found __ror__, through type.__ror__)
+binary_methods = (
+    ("__add__", operator.add, True),
+    ("__and__", operator.and_, True),
+    ("__eq__", operator.eq, False),
+    ("__floordiv__", operator.floordiv, True),
+    ("__ge__", operator.ge, False),
+    ("__gt__", operator.gt, False),
+    ("__le__", operator.le, False),
+    ("__lt__", operator.lt, False),
+    ("__mod__", operator.mod, True),
+    ("__mul__", operator.mul, True),
+    ("__ne__", operator.ne, False),
+    ("__or__", operator.or_, True),
+    ("__pow__", operator.pow, True),
+    ("__sub__", operator.sub, True),
+    ("__truediv__", operator.truediv, True),
+    ("__xor__", operator.xor, True),
+    ("add", operator.add, False),
+    ("and_", operator.and_, False),
+    ("eq", operator.eq, False),
+    ("floordiv", operator.floordiv, False),
+    ("ge", operator.ge, False),
+    ("gt", operator.gt, False),
+    ("le", operator.le, False),
+    ("lt", operator.lt, False),
+    ("mod", operator.mod, False),
+    ("mul", operator.mul, False),
+    ("ne", operator.ne, False),
+    ("or_", operator.or_, False),
+    ("pow", operator.pow, False),
+    ("sub", operator.sub, False),
+    ("truediv", operator.truediv, False),
+    ("xor", operator.xor, False),
+)
+
+def identity(x: ftypes.Any) -> ftypes.Any:
+    """Returns x unchanged."""
+
+    return x
+
+
 def get_funcname(obj: ftypes.GenericFunction | ftypes.Any) -> str:
     """Gets the __name__ of obj or the function it wraps."""
 
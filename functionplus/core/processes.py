@@ -0,0 +1,389 @@
+from __future__ import annotations
+
+import os
+import pickle
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from . import chunked, graph
+from . import types as ftypes
+from .evaluator import get_plan
+
+__all__ = ["SharedArray", "SharedPool", "as_run", "process_map", "evaluate_shared"]
+
+# how many blocks each worker gets (on average) in SharedPool.evaluate,
+# which evens out the load if some blocks are slower than others
+BLOCKS_PER_WORKER = 4
+
+# the function installed in each worker process by _install,
+# and how blocks of arrays are evaluated with it
+_function: ftypes.GenericFunction | None = None
+_run: ftypes.Callable[[tuple, dict], ftypes.Any] | None = None
+
+
+def _install(payload: bytes) -> None:
+    global _function, _run  # pylint: disable=W0603
+    _function = pickle.loads(payload)
+    _run = as_run(_function)
+
+
+def _call(arg: ftypes.Any) -> ftypes.Any:
+    return _function(arg)
+
+
+def as_run(
+    function: ftypes.GenericFunction,
+) -> ftypes.Callable[[tuple, dict], ftypes.Any]:
+    """Returns a callable evaluating function given its positional and
+    keyword arguments, as chunked.evaluate_chunked takes. Expressions
+    (e.g. Functions) are evaluated by their plan's buffers.FusedPlan,
+    which computes each block's output straight into the output array."""
+
+    node = getattr(function, "node", None)
+    if isinstance(node, graph.Node) and not isinstance(node, graph.Leaf):
+        return get_plan(node).fuse()
+    return lambda args, kwargs: function(*args, **kwargs)
+
+
+class _Mapping:
+    """Exposes a shared memory block to NumPy, which keeps this object as
+    the base of every array viewing the block, so that the block stays
+    mapped until the last of them is gone."""
+
+    def __init__(
+        self, block: SharedMemory, shape: tuple[int, ...], dtype: np.dtype
+    ) -> None:
+        self.block = block
+        interface = np.ndarray(shape, dtype, buffer=block.buf).__array_interface__
+        self.__array_interface__ = {**interface, "data": (interface["data"][0], False)}
+
+
+class SharedArray:
+    """A NumPy array in a shared memory block, which worker processes can
+    read and write without it being copied or pickled.
+
+    The block is unlinked by release (or on leaving a with statement), so
+    that no other process can attach to it anymore, and its memory is freed
+    once the array and every view of it are gone. Blocks that are never
+    released are unlinked once their SharedArray is garbage collected.
+
+    Attributes:
+        array (ndarray): The array, backed by the block.
+    """
+
+    def __init__(self, shape: tuple[int, ...], dtype: ftypes.Any) -> None:
+        """Creates an (uninitialized) array in a new shared memory block.
+
+        Args:
+            shape (tuple[int, ...]): The array's shape.
+            dtype (Any): The array's dtype.
+
+        Raises:
+            ValueError: If dtype is an object dtype.
+        """
+
+        dtype = np.dtype(dtype)
+        if dtype.hasobject:
+            raise ValueError("object arrays can't be placed in shared memory")
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        block = SharedMemory(create=True, size=max(nbytes, 1))
+        self.array = np.asarray(_Mapping(block, shape, dtype))
+        self.name = block.name
+        self._release = weakref.finalize(self, block.unlink)
+
+    @classmethod
+    def copy_of(cls, array: np.ndarray) -> SharedArray:
+        """Returns a SharedArray holding a copy of array."""
+
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def spec(self) -> tuple[str, tuple[int, ...], np.dtype]:
+        """What a worker needs to attach to the array: the block's name,
+        and the array's shape and dtype."""
+
+        return self.name, self.array.shape, self.array.dtype
+
+    def release(self) -> None:
+        """Unlinks the shared memory block. Calling this again does nothing."""
+
+        self.array = None
+        self._release()
+
+    def __array__(
+        self, dtype: ftypes.Any = None, copy: bool | None = None
+    ) -> np.ndarray:
+        array = self.array if dtype is None else self.array.astype(dtype, copy=False)
+        return array.copy() if copy else array
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __enter__(self) -> SharedArray:
+        return self
+
+    def __exit__(self, *exc_info: ftypes.Any) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return f"<SharedArray {self.name}>"
+
+
+def _evaluate_block(task: tuple[ftypes.Any, ...]) -> None:
+    """Evaluates the installed function on some rows of arrays in shared
+    memory, writing the results into the shared output array."""
+
+    specs, kwargs, out_spec, rows, chunk_size = task
+    blocks: list[SharedMemory] = []
+
+    def attach(name: str, shape: tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+        block = SharedMemory(name)
+        blocks.append(block)
+        return np.ndarray(shape, dtype, buffer=block.buf)
+
+    try:
+        args = tuple(
+            attach(*spec)[rows] if shared else spec for shared, spec in specs
+        )
+        out = attach(*out_spec)[rows]
+        chunked.evaluate_chunked(_run, args, kwargs, chunk_size, out=out)
+    finally:
+        # the views must be gone before the blocks can be closed
+        args = out = None
+        for block in blocks:
+            block.close()
+
+
+def process_map(
+    function: ftypes.GenericFunction,
+    inputs: ftypes.Iterable[ftypes.Any],
+    workers: int | None = None,
+    chunksize: int = 1,
+    mp_context: ftypes.Any = None,
+) -> list[ftypes.Any]:
+    """Calls function on each of inputs in a pool of worker processes.
+
+    The function is pickled once and unpickled once per worker, rather
+    than being sent along with every input, so it (including every leaf
+    of a Function's expression graph) must be picklable. Functions
+    defined at the top level of a module are pickled by reference, but
+    lambdas and nested functions can't be pickled.
+
+    Args:
+        function (GenericFunction): The function to call.
+        inputs (Iterable[Any]): The inputs, each of which is passed to
+        function as its only argument, and must be picklable.
+        workers (int | None, optional): The number of worker processes.
+        Defaults to None, meaning the number of CPUs.
+        chunksize (int, optional): How many inputs are sent to a worker at
+        once; larger values cut the cost of communicating with the workers
+        when there are many cheap inputs. Defaults to 1.
+        mp_context (Any, optional): The multiprocessing context used to
+        start the workers. Defaults to None, meaning the default context.
+
+    Raises:
+        pickle.PicklingError | AttributeError: If function can't be pickled.
+
+    Returns:
+        list[Any]: The results, in the same order as inputs.
+    """
+
+    payload = pickle.dumps(function)
+    with ProcessPoolExecutor(
+        workers, mp_context, initializer=_install, initargs=(payload,)
+    ) as executor:
+        return list(executor.map(_call, inputs, chunksize=chunksize))
+
+
+class SharedPool:
+    """A pool of worker processes evaluating a function block by block on
+    arrays in shared memory, which is reused by every call so that the
+    workers are only started, and the function only pickled, once.
+
+    Each call splits the first axis of its array arguments into blocks,
+    and each worker reads its rows of them and writes its results straight
+    into a shared output array, so no array is ever pickled. Arguments
+    given as SharedArrays are used where they are, while other arrays
+    are copied into shared memory for the call. As with
+    chunked.evaluate_chunked, this is only valid if each row of the output
+    depends only on the same row of the array arguments, and within each
+    worker the rows are evaluated in cache-sized chunks.
+
+    Use the pool as a context manager, or call shutdown once done.
+
+    Attributes:
+        function (GenericFunction): The function being evaluated, which must
+        be picklable (see process_map).
+        workers (int): The number of worker processes.
+        chunk_size (int): The (approximate) number of elements per chunk
+        within each worker.
+    """
+
+    def __init__(
+        self,
+        function: ftypes.GenericFunction,
+        workers: int | None = None,
+        chunk_size: int = chunked.DEFAULT_CHUNK_SIZE,
+        mp_context: ftypes.Any = None,
+    ) -> None:
+        """Creates the pool, whose workers start on first use.
+
+        Args:
+            function (GenericFunction): The function to evaluate.
+            workers (int | None, optional): The number of worker processes.
+            Defaults to None, meaning the number of CPUs.
+            chunk_size (int, optional): The number of elements per chunk
+            within each worker. Defaults to chunked.DEFAULT_CHUNK_SIZE.
+            mp_context (Any, optional): The multiprocessing context used to
+            start the workers. Defaults to None, meaning the default context.
+
+        Raises:
+            pickle.PicklingError | AttributeError: If function can't be pickled.
+        """
+
+        self.function = function
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._run = as_run(function)
+        self._executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context,
+            initializer=_install,
+            initargs=(pickle.dumps(function),),
+        )
+
+    def evaluate(
+        self,
+        *args: ftypes.Any,
+        out: SharedArray | None = None,
+        **kwargs: ftypes.Any,
+    ) -> SharedArray:
+        """Evaluates function(*args, **kwargs) in the pool.
+
+        Args:
+            args (Any): The positional arguments. SharedArrays and NumPy
+            arrays with at least one dimension are split into blocks, and
+            must all have the same length; other arguments are pickled.
+            out (SharedArray | None, optional): If given, the output is
+            written into it. Defaults to None, meaning a new SharedArray.
+            kwargs (Any): The keyword arguments, which are pickled.
+
+        Raises:
+            ValueError: If an array argument or the output has an object
+            dtype, out has the wrong length, or the function isn't
+            elementwise along the first axis.
+
+        Returns:
+            SharedArray: The output, which the caller must release.
+        """
+
+        arrays = tuple(
+            arg.array if isinstance(arg, SharedArray) else arg for arg in args
+        )
+        size = max(
+            (arg.size for arg in arrays if isinstance(arg, np.ndarray) and arg.ndim),
+            default=0,
+        )
+        n_blocks = self.workers * BLOCKS_PER_WORKER
+        length, slices = chunked.chunks(arrays, max(-(-size // n_blocks), 1))
+        if out is not None and len(out) != length:
+            raise ValueError("out must have one row per row of the arguments")
+
+        copies: list[SharedArray] = []
+        specs: list[tuple[bool, ftypes.Any]] = []
+        result = out
+        try:
+            for arg, array in zip(args, arrays):
+                if not isinstance(array, np.ndarray) or not array.ndim:
+                    specs.append((False, arg))
+                    continue
+                if not isinstance(arg, SharedArray):
+                    arg = SharedArray.copy_of(array)
+                    copies.append(arg)
+                specs.append((True, arg.spec))
+
+            if result is None:
+                # the first block is evaluated here to find the output's
+                # dtype and the shape of its rows
+                first = chunked.evaluate_chunked(
+                    self._run,
+                    tuple(
+                        array[slices[0]] if is_shared else array
+                        for (is_shared, _), array in zip(specs, arrays)
+                    ),
+                    kwargs,
+                    self.chunk_size,
+                )
+                result = SharedArray((length, *first.shape[1:]), first.dtype)
+                result.array[slices[0]] = first
+                slices = slices[1:]
+
+            tasks = [
+                (specs, kwargs, result.spec, rows, self.chunk_size) for rows in slices
+            ]
+            for _ in self._executor.map(_evaluate_block, tasks):
+                pass
+        except BaseException:
+            if result is not out:
+                result.release()
+            raise
+        finally:
+            for copy in copies:
+                copy.release()
+        return result
+
+    def shutdown(self) -> None:
+        """Stops the worker processes."""
+
+        self._executor.shutdown()
+
+    def __enter__(self) -> SharedPool:
+        return self
+
+    def __exit__(self, *exc_info: ftypes.Any) -> None:
+        self.shutdown()
+
+
+def evaluate_shared(
+    function: ftypes.GenericFunction,
+    args: tuple[ftypes.Any, ...],
+    kwargs: dict[str, ftypes.Any],
+    workers: int | None = None,
+    chunk_size: int = chunked.DEFAULT_CHUNK_SIZE,
+    mp_context: ftypes.Any = None,
+    out: SharedArray | None = None,
+) -> SharedArray:
+    """Evaluates function(*args, **kwargs) block by block along the first
+    axis of its array arguments in a new SharedPool, which is shut down
+    once the call ends. To make many calls, use a SharedPool instead.
+
+    Args:
+        function (GenericFunction): The function to evaluate, which must
+        be picklable (see process_map).
+        args (tuple[Any, ...]): The positional arguments (see
+        SharedPool.evaluate).
+        kwargs (dict[str, Any]): The keyword arguments, which are pickled.
+        workers (int | None, optional): The number of worker processes.
+        Defaults to None, meaning the number of CPUs.
+        chunk_size (int, optional): The (approximate) number of elements
+        per chunk within each worker. Defaults to chunked.DEFAULT_CHUNK_SIZE.
+        mp_context (Any, optional): The multiprocessing context used to
+        start the workers. Defaults to None, meaning the default context.
+        out (SharedArray | None, optional): If given, the output is written
+        into it. Defaults to None, meaning a new SharedArray.
+
+    Raises:
+        ValueError: If an array argument or the output has an object dtype,
+        or the function isn't elementwise along the first axis.
+
+    Returns:
+        SharedArray: The output, which the caller must release.
+    """
+
+    with SharedPool(function, workers, chunk_size, mp_context) as pool:
+        return pool.evaluate(*args, out=out, **kwargs)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import cmath
+import operator
+from numbers import Number
+
+from . import graph, ops
+from . import types as ftypes
+
+__all__ = ["ASSOCIATIVE", "is_scalar", "fold_constants", "fold_binary", "simplify"]
+
+ASSOCIATIVE = frozenset(
+    [operator.add, operator.mul, operator.and_, operator.or_, operator.xor]
+)
+
+
+def is_scalar(node: graph.Node) -> bool:
+    """Checks if node is a Constant holding a finite scalar number."""
+
+    if not isinstance(node, graph.Constant) or not isinstance(node.value, Number):
+        return False
+    try:
+        return cmath.isfinite(node.value)
+    except (OverflowError, TypeError):
+        return False
+
+
+def fold_constants(
+    op: ftypes.Operator, *operands: graph.Node
+) -> graph.Constant | None:
+    """Computes op on the values of operands if they're all constants.
+
+    Returns:
+        Constant | None: The result as a constant, or None if any operand
+        isn't constant or the operator raised (so that it raises again
+        when the expression is called instead).
+    """
+
+    if not all(isinstance(operand, graph.Constant) for operand in operands):
+        return None
+    try:
+        return graph.Constant(op(*[operand.value for operand in operands]))
+    except Exception:  # pylint: disable=W0718
+        return None
+
+
+def _mergeable(op: ftypes.BinaryOperator, *constants: graph.Constant) -> bool:
+    """Checks if constants can be merged when re-associating op, i.e. if
+    they're all floats (or complex), or all bools combined bitwise."""
+
+    values = [constant.value for constant in constants]
+    if all(isinstance(value, bool) for value in values):
+        return op in (operator.and_, operator.or_, operator.xor)
+    return all(isinstance(value, (float, complex)) for value in values)
+
+
+def fold_binary(
+    op: ftypes.BinaryOperator, left: graph.Node, right: graph.Node
+) -> graph.Node:
+    """Builds the node computing op(left, right), folding constants.
+
+    Constant operands are combined directly, and for associative operators
+    a scalar constant next to a chain of the same operator is merged with
+    the chain's own scalar constant, e.g. (f + 1.0) + 2.0 becomes f + 3.0
+    and 2.0 * (3.0 * f) becomes 6.0 * f. Only associativity is used, never
+    commutativity, and only finite float (or complex) constants and bools
+    combined by bitwise operators are re-associated, although
+    floating-point results may still differ in their last bits. Integers
+    aren't, since their merged value may not fit in the dtype of an integer
+    array (e.g. (f * 100) * 100 for int8 arrays).
+
+    Args:
+        op (BinaryOperator): The operator from the operator module.
+        left (Node): The left-hand operand.
+        right (Node): The right-hand operand.
+
+    Returns:
+        Node: A node equivalent to BinaryNode(op, left, right).
+    """
+
+    folded = fold_constants(op, left, right)
+    if folded is not None:
+        return folded
+
+    if op in ASSOCIATIVE:
+        # (x op a) op b -> x op (a op b)
+        if (
+            is_scalar(right)
+            and isinstance(left, graph.BinaryNode)
+            and left.op is op
+            and is_scalar(left.right)
+            and _mergeable(op, left.right, right)
+        ):
+            merged = fold_constants(op, left.right, right)
+            if merged is not None and is_scalar(merged):
+                return graph.BinaryNode(op, left.left, merged)
+
+        # a op (b op x) -> (a op b) op x
+        if (
+            is_scalar(left)
+            and isinstance(right, graph.BinaryNode)
+            and right.op is op
+            and is_scalar(right.left)
+            and _mergeable(op, left, right.left)
+        ):
+            merged = fold_constants(op, left, right.left)
+            if merged is not None and is_scalar(merged):
+                return graph.BinaryNode(op, merged, right.right)
+
+    return graph.BinaryNode(op, left, right)
+
+
+def _equals(node: graph.Node, value: int | float) -> bool:
+    """Checks if node is a scalar constant of exactly the same type as value
+    and equal to it. The types must match since e.g. x * 1.0, unlike x * 1,
+    changes integers into floats, and x * True changes booleans into ints."""
+
+    return is_scalar(node) and type(node.value) is type(value) and node.value == value
+
+
+def _is_identity(node: graph.Node) -> bool:
+    return isinstance(node, graph.Leaf) and node.function is ops.identity
+
+
+def _rewrite_unary(node: graph.UnaryNode) -> tuple[graph.Node, str] | None:
+    operand = node.operand
+    if isinstance(operand, graph.UnaryNode):
+        if node.op is operator.neg and operand.op is operator.neg:
+            return operand.operand, "-(-x) -> x"
+        if node.op is operator.abs and operand.op is operator.abs:
+            return operand, "abs(abs(x)) -> abs(x)"
+        # abs(-x) isn't abs(x) for unsigned integers, where -x wraps around
+    return None
+
+
+def _rewrite_binary(node: graph.BinaryNode) -> tuple[graph.Node, str] | None:
+    op, left, right = node.op, node.left, node.right
+
+    if op is operator.mul:
+        if _equals(right, 1):
+            return left, "x * 1 -> x"
+        if _equals(left, 1):
+            return right, "1 * x -> x"
+    elif op is operator.add:
+        if _equals(right, 0):
+            return left, "x + 0 -> x"
+        if _equals(left, 0):
+            return right, "0 + x -> x"
+    elif op is operator.sub:
+        if _equals(right, 0):
+            return left, "x - 0 -> x"
+    elif op is operator.truediv:
+        # not even x / 1 is dropped, since it changes integers into floats
+        if is_scalar(right) and not isinstance(right.value, bool) and right.value:
+            reciprocal = fold_constants(operator.truediv, graph.Constant(1), right)
+            if reciprocal is not None and is_scalar(reciprocal):
+                return (
+                    graph.BinaryNode(operator.mul, left, reciprocal),
+                    f"x / {right.value!r} -> x * {reciprocal.value!r}",
+                )
+    elif op is operator.pow:
+        if _equals(right, 1):
+            return left, "x ** 1 -> x"
+        if _equals(right, 2):
+            return graph.BinaryNode(operator.mul, left, left), "x ** 2 -> x * x"
+        if _equals(right, 0.5):
+            from numpy import sqrt  # pylint: disable=C0415
+
+            return graph.CompositionNode(graph.Leaf(sqrt), left), "x ** 0.5 -> sqrt(x)"
+
+    folded = fold_binary(op, left, right)
+    if folded.children != node.children:
+        return folded, "folded constants"
+    return None
+
+
+def _rewrite(node: graph.Node) -> tuple[graph.Node, str] | None:
+    """Applies the first rule matching node, returning the rewritten
+    node and a description of the rule, or None if no rule matches."""
+
+    if isinstance(node, graph.UnaryNode):
+        return _rewrite_unary(node)
+    if isinstance(node, graph.BinaryNode):
+        return _rewrite_binary(node)
+    if isinstance(node, graph.CompositionNode):
+        if _is_identity(node.outer):
+            return node.inner, "id @ f -> f"
+        if _is_identity(node.inner):
+            return node.outer, "f @ id -> f"
+    return None
+
+
+def simplify(root: graph.Node, report: list[str] | None = None) -> graph.Node:
+    """Algebraically simplifies the expression graph rooted at root.
+
+    Identity operations (x * 1, x + 0, x - 0, x ** 1, -(-x),
+    Function.id() @ f and f @ Function.id()) are removed, constants are
+    folded, and some operations are strength-reduced: x ** 2 becomes
+    x * x, x ** 0.5 becomes numpy.sqrt(x) and division by a constant
+    becomes multiplication by its reciprocal. Identities are only removed
+    when their constant is a plain int (so x * 1.0 and x / 1 are kept,
+    as they change integers into floats), so the result has the same type
+    as before.
+
+    These rewrites assume that the expression's values are real or complex
+    numbers (or arrays of them) and are exact only up to floating-point
+    rounding and signed zeros; e.g. x * 1 isn't the identity on booleans,
+    and numpy.sqrt of a negative float is nan rather than complex.
+
+    Args:
+        root (Node): The root of the graph to simplify.
+        report (list[str] | None, optional): If given, a description of
+        each rewrite that was made is appended to it. Defaults to None.
+
+    Returns:
+        Node: The root of the simplified graph, or root itself if
+        nothing could be simplified.
+    """
+
+    def rewrite(node: graph.Node) -> graph.Node:
+        while (rewritten := _rewrite(node)) is not None:
+            node, change = rewritten
+            if report is not None:
+                report.append(change)
+        return node
+
+    return graph.transform(root, rewrite)
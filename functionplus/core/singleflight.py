@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from . import cache
+from . import types as ftypes
+from .wrappers import Wrapper
+
+__all__ = ["SingleFlight", "AsyncSingleFlight"]
+
+
+class _Flight:
+    """A call in progress, which identical calls wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: ftypes.Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Wrapper):
+    """A callable that deduplicates identical concurrent calls of another
+    callable made from different threads.
+
+    The first call with some arguments computes the result while any
+    identical calls made before it finishes wait for it and share its
+    result (or exception). Unlike Memoized, nothing is kept once the
+    call has finished, so later calls compute the result again.
+
+    Arguments are keyed as by cache.make_key, and calls whose arguments
+    can't be keyed are never shared. Note that callers sharing a result
+    get the same object, so a mutable result (e.g. a NumPy array) should
+    be copied before being changed.
+
+    Attributes:
+        function (GenericFunction): The callable being deduplicated.
+        arrays (str): How arrays are keyed; either 'content' or 'identity'.
+        calls (int): The number of calls made so far.
+        shared (int): The number of calls that shared another's result.
+    """
+
+    def __init__(
+        self, function: ftypes.GenericFunction, arrays: str = "content"
+    ) -> None:
+        if arrays not in cache.ARRAY_MODES:
+            raise ValueError(
+                f"arrays must be one of {cache.ARRAY_MODES}, not {arrays!r}"
+            )
+
+        super().__init__(function)
+        self.arrays = arrays
+        self.calls = self.shared = 0
+
+        self._flights: dict[ftypes.Any, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        key = cache.make_key(args, kwargs, self.arrays)
+        with self._lock:
+            self.calls += 1
+            flight = None if key is None else self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+            elif key is not None:
+                self._flights[key] = leader = _Flight()
+
+        if key is None:
+            return self.function(*args, **kwargs)
+
+        if flight is not None:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            leader.result = self.function(*args, **kwargs)
+            return leader.result
+        except BaseException as error:
+            leader.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            leader.done.set()
+
+
+class AsyncSingleFlight(SingleFlight):
+    """A SingleFlight for asynchronous callables, deduplicating identical
+    calls awaited concurrently by different tasks.
+
+    The first call's coroutine runs as a task that identical calls await
+    alongside it, so cancelling one waiting caller doesn't cancel the
+    shared call. Calls must all come from one event loop.
+    """
+
+    def __init__(
+        self, function: ftypes.GenericFunction, arrays: str = "content"
+    ) -> None:
+        super().__init__(function, arrays)
+        self._tasks: dict[ftypes.Any, asyncio.Future] = {}
+
+    async def __call__(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        key = cache.make_key(args, kwargs, self.arrays)
+        self.calls += 1
+        if key is None:
+            return await self.function(*args, **kwargs)
+
+        task = self._tasks.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = self._tasks[key] = asyncio.ensure_future(
+                self.function(*args, **kwargs)
+            )
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        # shielded so that cancelling one caller doesn't cancel the rest
+        return await asyncio.shield(task)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from queue import SimpleQueue
+from typing import NamedTuple
+
+from . import graph
+from . import types as ftypes
+from .evaluator import evaluate, get_plan, is_async
+from .wrappers import Wrapper
+
+__all__ = ["DEFAULT_THRESHOLD", "ConcurrencyInfo", "Concurrent", "shared_executor"]
+
+# steps that took at least this many seconds when profiled are worth
+# handing to another thread, which costs tens of microseconds
+DEFAULT_THRESHOLD = 1e-4
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Returns the thread pool shared by every Concurrent function,
+    creating it on first use."""
+
+    global _executor  # pylint: disable=W0603
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="functionplus")
+        return _executor
+
+
+class ConcurrencyInfo(NamedTuple):
+    """Statistics of a Concurrent function's evaluations."""
+
+    calls: int
+    offloaded: int
+    busy_time: float
+    wall_time: float
+
+    @property
+    def parallelism(self) -> float:
+        """The average number of steps running at once, i.e. the total
+        time spent in steps divided by the time spent in calls."""
+
+        return self.busy_time / self.wall_time if self.wall_time else 0.0
+
+
+def _timed(
+    function: ftypes.GenericFunction,
+    args: ftypes.Any,
+    kwargs: dict[str, ftypes.Any],
+) -> tuple[ftypes.Any, float]:
+    start = time.perf_counter()
+    value = function(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+# marks the threads running offloaded steps (see _offloaded)
+_local = threading.local()
+
+
+def _offloaded(
+    function: ftypes.GenericFunction,
+    args: ftypes.Any,
+    kwargs: dict[str, ftypes.Any],
+) -> tuple[ftypes.Any, float]:
+    """Runs an offloaded step, marking the executor's thread meanwhile so
+    that Concurrent functions called by the step evaluate every step
+    themselves; waiting on steps queued behind it could deadlock."""
+
+    _local.offloading = True
+    try:
+        return _timed(function, args, kwargs)
+    finally:
+        _local.offloading = False
+
+
+class Concurrent(Wrapper):
+    """A callable that evaluates an expression with independent steps
+    (e.g. the two operands of a binary operator) running at the same time
+    on a thread pool.
+
+    The first call evaluates the plan in order, timing each step. Later
+    calls hand each step that took at least threshold seconds to the
+    executor whenever there's other work that's ready to run meanwhile,
+    while cheap steps, and expensive ones with nothing to overlap with,
+    run in the calling thread. This only speeds things up if the
+    expensive steps release the GIL, as NumPy kernels and I/O do, and
+    every leaf must be safe to call from several threads at once.
+    Concurrent functions nested in a step that runs on the executor
+    evaluate all of their steps in that thread, so they never wait on
+    the executor they're running on.
+
+    Asynchronous expressions aren't supported, since evaluate_async
+    already awaits their independent steps concurrently.
+
+    Attributes:
+        function (GenericFunction): The function being evaluated.
+        threshold (float): How many seconds a step must have taken
+        for it to run on the executor.
+        executor (Executor): The executor steps are run on.
+
+    Raises:
+        ValueError: If function is asynchronous.
+    """
+
+    def __init__(
+        self,
+        function: ftypes.GenericFunction,
+        threshold: float = DEFAULT_THRESHOLD,
+        executor: Executor | None = None,
+    ) -> None:
+        if threshold < 0:
+            raise ValueError("threshold must be non-negative")
+        node = graph.as_node(function)
+        if is_async(node):
+            raise ValueError(
+                "asynchronous functions already evaluate their steps concurrently"
+            )
+
+        super().__init__(function)
+        self.threshold = threshold
+        self.executor = executor or shared_executor()
+
+        self.node = node
+        self._costs: list[float] | None = None
+        self._lock = threading.Lock()
+        self._calls = self._offloaded = 0
+        self._busy_time = self._wall_time = 0.0
+
+        if isinstance(self.node, graph.Leaf):
+            return
+
+        # the steps each step depends on and that depend on it,
+        # and how many steps use each slot
+        plan = self.plan = get_plan(self.node)
+        producer = {step[0]: i for i, step in enumerate(plan.steps)}
+        self._n_deps: list[int] = []
+        self._dependents: list[list[int]] = [[] for _ in plan.steps]
+        self._uses: dict[int, int] = {}
+        for i, (_, _, operands, _) in enumerate(plan.steps):
+            deps = {producer[j] for j in operands or () if j in producer}
+            self._n_deps.append(len(deps))
+            for dep in deps:
+                self._dependents[dep].append(i)
+            for j in set(operands or ()):
+                if j in producer:
+                    self._uses[j] = self._uses.get(j, 0) + 1
+
+    def __call__(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        node = self.node
+        if isinstance(node, graph.Leaf):
+            return evaluate(node, args, kwargs)
+
+        start = time.perf_counter()
+        if self._costs is None:
+            value, busy, offloaded = self._profile(args, kwargs)
+        else:
+            value, busy, offloaded = self._run(args, kwargs)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._calls += 1
+            self._offloaded += offloaded
+            self._busy_time += busy
+            self._wall_time += elapsed
+        return value
+
+    def _inputs(self, operands, values, args, kwargs) -> tuple[ftypes.Any, dict]:
+        if operands is None:
+            return args, kwargs
+        return [values[i] for i in operands], {}
+
+    def _profile(self, args, kwargs) -> tuple[ftypes.Any, float, int]:
+        """Evaluates the plan in order, recording how long each step took."""
+
+        plan = self.plan
+        values = plan.template.copy()
+        costs = []
+        for slot, function, operands, dead in plan.steps:
+            inputs, kw = self._inputs(operands, values, args, kwargs)
+            values[slot], elapsed = _timed(function, inputs, kw)
+            costs.append(elapsed)
+            for i in dead:
+                values[i] = None
+        self._costs = costs
+        return values[plan.output], sum(costs), 0
+
+    def _run(self, args, kwargs) -> tuple[ftypes.Any, float, int]:
+        """Evaluates the plan, running expensive steps on the executor."""
+
+        plan, costs, threshold = self.plan, self._costs, self.threshold
+        values = plan.template.copy()
+        n_deps = self._n_deps.copy()
+        uses = self._uses.copy()
+        ready = deque(i for i, n in enumerate(n_deps) if not n)
+        finished: SimpleQueue[tuple[int, Future]] = SimpleQueue()
+        busy, offloaded, remaining = 0.0, 0, len(plan.steps)
+        # steps run by the executor never wait on it themselves
+        inline = getattr(_local, "offloading", False)
+
+        while remaining:
+            if ready:
+                i = ready.popleft()
+                slot, function, operands, _ = plan.steps[i]
+                inputs, kw = self._inputs(operands, values, args, kwargs)
+                if costs[i] >= threshold and ready and not inline:
+                    future = self.executor.submit(_offloaded, function, inputs, kw)
+                    future.add_done_callback(
+                        lambda future, i=i: finished.put((i, future))
+                    )
+                    offloaded += 1
+                    continue
+                value, elapsed = _timed(function, inputs, kw)
+            else:
+                i, future = finished.get()
+                slot, _, operands, _ = plan.steps[i]
+                value, elapsed = future.result()
+
+            busy += elapsed
+            remaining -= 1
+            values[slot] = value
+            for dependent in self._dependents[i]:
+                n_deps[dependent] -= 1
+                if not n_deps[dependent]:
+                    ready.append(dependent)
+            for j in set(operands or ()):
+                if j in uses:
+                    uses[j] -= 1
+                    if not uses[j] and j != plan.output:
+                        values[j] = None
+
+        return values[plan.output], busy, offloaded
+
+    def concurrency_info(self) -> ConcurrencyInfo:
+        """Returns how many calls were made and steps offloaded, the total
+        time spent in steps and in calls, and so the achieved parallelism."""
+
+        with self._lock:
+            return ConcurrencyInfo(
+                self._calls, self._offloaded, self._busy_time, self._wall_time
+            )
@@ -1,4 +1,4 @@
-from typing import Any, Callable, Self
+from typing import Any, Callable, Iterable, Iterator, Self
 
 GenericFunction = Callable[..., Any]
 BinaryOperator = Callable[[Any, Any], Any]
@@ -8,6 +8,8 @@ Operator = BinaryOperator | UnaryOperator
 __all__ = [
     "Any",
     "Callable",
+    "Iterable",
+    "Iterator",
     "Self",
     "GenericFunction",
     "BinaryOperator",
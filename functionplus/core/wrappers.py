@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from . import ops
+from . import types as ftypes
+
+__all__ = ["Docstring", "Wrapper"]
+
+
+class Docstring:
+    """A descriptor giving instances the docstring made by their describe
+    method on first access rather than when they're created, as rendering
+    it may be expensive, unless one was set explicitly. Either way it's
+    kept in their _doc attribute. On the class itself, it gives the
+    class's own docstring."""
+
+    def __init__(self, doc: str | None) -> None:
+        self.doc = doc
+
+    def __get__(self, instance: ftypes.Any, owner: type) -> str | None:
+        if instance is None:
+            return self.doc
+        if instance._doc is None:
+            instance._doc = instance.describe()
+        return instance._doc
+
+    def __set__(self, instance: ftypes.Any, doc: str | None) -> None:
+        instance._doc = doc
+
+
+class Wrapper:
+    """Base class of the callables that wrap a function to change how
+    it's called (e.g. Memoized or Concurrent), which take on its name,
+    docstring and components.
+
+    The name and docstring are looked up on access rather than copied,
+    as rendering those of a large expression takes time quadratic in
+    its size.
+
+    Attributes:
+        function (GenericFunction): The function being wrapped.
+    """
+
+    __doc__ = Docstring(__doc__)
+    _doc = None
+
+    def __init_subclass__(cls, **kwargs: ftypes.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # a subclass's docstring would otherwise hide the descriptor
+        cls.__doc__ = Docstring(cls.__dict__.get("__doc__"))
+
+    def __init__(self, function: ftypes.GenericFunction) -> None:
+        self.function = function
+
+    @property
+    def __name__(self) -> str:
+        return ops.get_funcname(self.function)
+
+    def describe(self) -> str | None:
+        """Returns the docstring of the function being wrapped."""
+
+        return getattr(self.function, "__doc__", None)
+
+    @property
+    def components(self) -> set[ftypes.GenericFunction]:
+        """The components of the function being wrapped."""
+
+        return getattr(self.function, "components", {self.function})
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.__name__}>"
@@ -1,33 +1,85 @@
-import operator
-from functools import partial, update_wrapper
-from inspect import signature
+from functools import partial
 
-from .core import dunder, ops
+from .core import dunder, graph, ops, simplify
 from .core import types as ftypes
+from .core.evaluator import evaluate, get_plan, is_async
+from .core.wrappers import Docstring
 
 __all__ = ["Function"]
 
+# metadata a Function wrapping a single callable forwards to it (as
+# functools.update_wrapper would copy it), besides __name__, __doc__
+# and __module__, which have descriptors of their own
+WRAPPED_ATTRIBUTES = ("__qualname__", "__annotations__", "__type_params__")
+
+
+class Module(str):
+    """A descriptor giving each Function wrapping a single callable that
+    callable's module. On the class itself (and on composite functions),
+    it's the class's own module; it's a str so that it can stand in for
+    the class's __module__ wherever that's used."""
+
+    def __get__(self, instance: ftypes.Any, owner: type) -> str:
+        if instance is None or not isinstance(instance.node, graph.Leaf):
+            return self
+        module = getattr(instance.node.function, "__module__", None)
+        return self if module is None else module
+
+    def __reduce__(self) -> tuple[ftypes.Any, ...]:
+        # pickled as a plain str, e.g. when a Function pickles its class
+        return str, (str(self),)
+
+
 class Function:
     """A wrapper class for functions that facilitates
     function arithmetic, boolean logic, and composition.
 
     Attributes:
-        function (ftypes.GenericFunction): The function being wrapped.
+        node (graph.Node): The root of the function's expression graph.
+        function (ftypes.GenericFunction): The function being wrapped,
+        or the root node of the expression graph for composite functions.
         components (set[ftypes.GenericFunction]): A set containing
         all of the functions used to create the total function. Does
         not include abs calls or operations involving non-callables.
-        name: The function's name.
-
+        name: The function's name. For composite functions, it's rendered
+        from the expression graph on first access.
+        max_name_length (int | None): If set on the class (or a subclass),
+        rendered names are cut short at this many characters (per
+        subexpression). Defaults to None.
+
+    Functions keep their attributes in __slots__ and compute everything
+    else on demand, so that large numbers of them stay cheap; the
+    __dict__ holding any other attributes is only allocated once one is
+    set. A Function wrapping a single callable forwards that callable's
+    metadata (e.g. __module__, __qualname__, __wrapped__ and the entries
+    of its __dict__) to it rather than copying it.
     """
 
+    __slots__ = ("node", "_name", "_doc", "_components", "__dict__", "__weakref__")
+
+    # not annotated, so that instances forward __annotations__ to their leaf
+    max_name_length = None
+
+    __doc__ = Docstring(__doc__)
+    __module__ = Module(__module__)
+
+    def __init_subclass__(cls, **kwargs: ftypes.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # a subclass's docstring and module would otherwise hide the descriptors
+        cls.__doc__ = Docstring(cls.__dict__.get("__doc__"))
+        cls.__module__ = Module(cls.__dict__["__module__"])
+
     def __init__(
-        self, function: ftypes.GenericFunction | ftypes.Self, name: str | None = None
+        self,
+        function: ftypes.GenericFunction | ftypes.Self | graph.Node,
+        name: str | None = None,
     ) -> None:
         """Wraps the supplied function.
 
         Args:
-            function (ftypes.GenericFunction | Function): Either a function
-            or a pre-existing Function object.
+            function (ftypes.GenericFunction | Function | Node): Either a
+            function, a pre-existing Function object or the root node of
+            an expression graph.
             name (str | None, optional): What to call the wrapped
             function. Defaults to None.
 
@@ -35,51 +87,142 @@ class Function:
             TypeError: If the function argument isn't callable.
         """
 
+        self._name = self._doc = self._components = None
         if isinstance(function, Function):
-            if name is None:
-                self.name = function.name
-            function = function.function
-
-        if not callable(function):
+            self._components = function._components
+            self._doc = function._doc
+            function = function.node
+
+        if isinstance(function, graph.Node):
+            node = function
+        elif callable(function):
+            node = graph.Leaf(function, name)
+            name = None
+        else:
             raise TypeError(f"{function} is not callable")
 
-        update_wrapper(self, function)
-
-        self.function: ftypes.GenericFunction = function
+        self.node: graph.Node = node
         if name is not None:
             self.name = name
 
-        self.components = set([self.function])
+    @property
+    def function(self) -> ftypes.GenericFunction:
+        """The function being wrapped, or the root node of the
+        expression graph for composite functions."""
+
+        node = self.node
+        return node.function if isinstance(node, graph.Leaf) else node
+
+    def __getattr__(self, name: str) -> ftypes.Any:
+        # only called for attributes Function doesn't have itself
+        try:
+            node = object.__getattribute__(self, "node")
+        except AttributeError:
+            node = None
+        if isinstance(node, graph.Leaf):
+            function = node.function
+            if name == "__wrapped__":
+                return function
+            if name in WRAPPED_ATTRIBUTES or name in getattr(function, "__dict__", ()):
+                return getattr(function, name)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
 
     @classmethod
     def id(cls, name: str = "id") -> ftypes.Self:
         """Returns the identity function."""
 
-        return cls(lambda x: x, name)
+        return cls(ops.identity, name)
 
     @property
     def name(self) -> str:
         """The function's name."""
 
-        return ops.get_funcname(self)
+        if self._name is None:
+            self._name = graph.render(self.node, self.max_name_length)
+        return self._name
 
     @name.setter
     def name(self, new_name: str) -> None:
-        self.__name__ = new_name
+        self.node = self.node.labeled(new_name)
+        self._name = new_name
+
+    __name__ = name
+
+    @property
+    def components(self) -> set[ftypes.GenericFunction]:
+        """The functions used to create the total function, collected
+        from the leaves of the expression graph on first access."""
+
+        if self._components is None:
+            components = set()
+            for node in graph.walk(self.node):
+                if isinstance(node, graph.Leaf):
+                    # leaves such as memoized functions report their own
+                    function = node.function
+                    components |= getattr(function, "components", {function})
+            self._components = components
+        return self._components
+
+    @components.setter
+    def components(self, components: set[ftypes.GenericFunction]) -> None:
+        self._components = components
+
+    def describe(self) -> str | None:
+        """Returns the default docstring of the function, based on
+        the type of the root of its expression graph. Leaves give the
+        docstring of the function they wrap."""
+
+        node = self.node
+        if isinstance(node, graph.Leaf):
+            return getattr(node.function, "__doc__", None)
+        if isinstance(node, graph.OperatorNode):
+            return f"Computes {self.name}(...)."
+        if isinstance(node, graph.CompositionNode):
+            return f"Applies the functions {self.name} from left to right."
+        if isinstance(node, graph.IterationNode):
+            base = graph.render(node.base, self.max_name_length)
+            return f"Applies {base} a total of {node.n} times."
+        return None
 
     def __repr__(self) -> str:
         return f"<Function '{self.name}'>"
 
+    def __reduce__(self) -> tuple[ftypes.Any, ...]:
+        # rebuilt from the expression graph, which pickles by structure,
+        # keeping any docstring or components that were set explicitly
+        slots = {
+            name: getattr(self, name)
+            for name in ("_doc", "_components")
+            if getattr(self, name) is not None
+        }
+        return self.__class__, (self.node,), (getattr(self, "__dict__", None), slots)
+
     def __hash__(self) -> int:
         return hash(self.function)
 
+    @property
+    def is_async(self) -> bool:
+        """Whether any of the functions used to create the total function
+        is a coroutine function, in which case calling it returns a
+        coroutine (see core.evaluator.evaluate_async)."""
+
+        return is_async(self.node)
+
     def __call__(self, *args, **kwargs):
-        """Calls self.function(*args, **kwargs)."""
+        """Evaluates the function's expression graph with *args and **kwargs.
+
+        If the function is asynchronous, this returns a coroutine that
+        awaits the leaves, awaiting independent operands concurrently."""
 
-        return self.function(*args, **kwargs)
+        return evaluate(self.node, args, kwargs)
 
     def composed(self, n: int = 1) -> ftypes.Self:
-        """Returns the composition of f with itself a total of n times."""
+        """Returns the composition of f with itself a total of n times.
+
+        The result is a single node that applies f in a loop, so it
+        is built in constant time and named f^n."""
 
         if n < 0:
             raise ValueError("n must be a non-negative integer")
@@ -87,11 +230,331 @@ class Function:
         if n == 0:
             return self.id()
 
-        g = self
-        for _ in range(n - 1):
-            g @= self
+        if n == 1:
+            return self
+
+        return self.__class__(graph.IterationNode(self.node, n))
+
+    def cached(
+        self, maxsize: int | None = 128, policy: str = "lru", arrays: str = "content"
+    ) -> ftypes.Self:
+        """Returns a function that memoizes the results of this one.
+
+        Its function attribute is a core.cache.Memoized (or, if this
+        function is asynchronous, AsyncMemoized) object, whose cache_info
+        method reports hit, miss and eviction statistics.
+
+        Args:
+            maxsize (int | None, optional): The most results kept at once,
+            or None for no limit. Defaults to 128.
+            policy (str, optional): Which result to evict once the cache
+            is full; either 'lru' or 'fifo'. Defaults to 'lru'.
+            arrays (str, optional): Whether NumPy arguments are keyed by
+            their 'content' (dtype, shape and a digest of their data) or
+            only by their 'identity', which is faster for huge arrays but
+            doesn't detect in-place changes. Defaults to 'content'.
+
+        Returns:
+            Function: The memoizing function.
+        """
+
+        from .core import cache  # pylint: disable=C0415
+
+        memoized = cache.AsyncMemoized if self.is_async else cache.Memoized
+        return self.__class__(memoized(self, maxsize, policy, arrays))
+
+    def batched(
+        self, max_batch: int = 1024, max_delay_ms: float = 1.0
+    ) -> ftypes.Self:
+        """Returns an asynchronous function that coalesces concurrent calls
+        on scalars into a single call of this function on NumPy arrays,
+        trading a little latency for much higher throughput (see
+        core.batching.Batcher).
+
+        Each call of the returned function must be awaited, and gets its
+        own element of the vectorized result. Its function attribute is
+        the Batcher, which counts the calls and batches made.
+
+        Args:
+            max_batch (int, optional): The most calls evaluated at once.
+            Defaults to 1024.
+            max_delay_ms (float, optional): The longest a call waits for
+            others to join its batch, in milliseconds. Defaults to 1.0.
+
+        Returns:
+            Function: The batching function.
+        """
+
+        from .core import batching  # pylint: disable=C0415
+
+        return self.__class__(batching.Batcher(self, max_batch, max_delay_ms))
+
+    def concurrent(
+        self,
+        threshold: float | None = None,
+        executor: ftypes.Any = None,
+    ) -> ftypes.Self:
+        """Returns a function that evaluates independent parts of this one
+        (e.g. both operands of a binary operator) at the same time on a
+        thread pool, which helps when they're expensive calls that release
+        the GIL, such as NumPy kernels or I/O.
+
+        Its function attribute is a core.threads.Concurrent object, whose
+        concurrency_info method reports the parallelism achieved.
+        Asynchronous functions are returned as they are, since their
+        independent steps are already awaited concurrently.
+
+        Args:
+            threshold (float | None, optional): How many seconds a step must
+            take (as timed on the first call) to be run on the thread pool;
+            cheaper steps run in the calling thread. Defaults to None,
+            meaning core.threads.DEFAULT_THRESHOLD.
+            executor (Executor | None, optional): The executor to run steps
+            on. Defaults to None, meaning a thread pool shared by every
+            such function.
+
+        Returns:
+            Function: The concurrent function.
+        """
+
+        if self.is_async:
+            return self
+
+        from .core import threads  # pylint: disable=C0415
+
+        if threshold is None:
+            threshold = threads.DEFAULT_THRESHOLD
+        return self.__class__(threads.Concurrent(self, threshold, executor))
+
+    def single_flight(self, arrays: str = "content") -> ftypes.Self:
+        """Returns a function that deduplicates identical concurrent calls
+        of this one: while a call is being computed, calls with the same
+        arguments from other threads (or, if this function is asynchronous,
+        other tasks) wait for it and share its result instead of computing
+        it again. Unlike cached, no result is kept once its call is done.
 
-        return g
+        Its function attribute is a core.singleflight.SingleFlight (or
+        AsyncSingleFlight) object, which counts the calls that were shared.
+
+        Args:
+            arrays (str, optional): Whether NumPy arguments are keyed by
+            their 'content' or their 'identity' (see cached). Defaults to
+            'content'.
+
+        Returns:
+            Function: The deduplicating function.
+        """
+
+        from .core import singleflight  # pylint: disable=C0415
+
+        if self.is_async:
+            flight = singleflight.AsyncSingleFlight(self, arrays)
+        else:
+            flight = singleflight.SingleFlight(self, arrays)
+        return self.__class__(flight)
+
+    def optimize(self, report: list[str] | None = None) -> ftypes.Self:
+        """Returns an equivalent function with its expression graph
+        algebraically simplified (see core.simplify.simplify).
+
+        Args:
+            report (list[str] | None, optional): If given, a description
+            of each rewrite that was made is appended to it.
+            Defaults to None.
+
+        Returns:
+            Function: The simplified function, or this function itself
+            if nothing could be simplified.
+        """
+
+        node = simplify.simplify(self.node, report)
+        if node is self.node:
+            return self
+
+        return self.__class__(node)
+
+    def compile(self) -> ftypes.Self:
+        """Compiles the function's expression graph into a single generated
+        Python function, with one line of straight-line code per operation,
+        which is used for every later call of this (or any other) Function
+        sharing the same graph.
+
+        Returns:
+            Function: This function, for chaining.
+        """
+
+        if not isinstance(self.node, graph.Leaf):
+            # the name and docstring are only used if they're at hand, as
+            # rendering them for a large expression can take far longer
+            # than compiling it
+            name = self._name or self.node.label or "compiled"
+            get_plan(self.node).compile(name, self._doc)
+        return self
+
+    def evaluate_fused(self, *args: ftypes.Any, **kwargs: ftypes.Any) -> ftypes.Any:
+        """Evaluates the function on NumPy arrays, writing intermediate
+        values into a small pool of reused scratch buffers rather than
+        allocating a new array for every operation (see
+        core.buffers.FusedPlan).
+
+        The first call for arrays of a given dtype and shape plans the
+        buffers and is evaluated normally. Arguments that aren't all
+        plain NumPy arrays are always evaluated normally, as are
+        asynchronous functions, for which this returns a coroutine.
+        """
+
+        if self.is_async:
+            return self(*args, **kwargs)
+        return get_plan(self.node).fuse()(args, kwargs)
+
+    def evaluate_chunked(
+        self,
+        *args: ftypes.Any,
+        chunk_size: int | str | None = None,
+        workers: int | None = None,
+        **kwargs: ftypes.Any,
+    ) -> ftypes.Any:
+        """Evaluates the function block by block along the first axis of its
+        array arguments, so that each block's intermediate values stay in
+        cache, and writes the results into a single output array.
+
+        Each block is evaluated with evaluate_fused. This is only valid if
+        each row of the output depends only on the same row of the array
+        arguments, as is the case for elementwise functions.
+
+        Args:
+            args (Any): The positional arguments. NumPy arrays with at
+            least one dimension are split into blocks, and must all have
+            the same length; other arguments are passed to every block.
+            chunk_size (int | str | None, optional): The (approximate)
+            number of elements per block. If 'auto', the fastest size is
+            found with core.chunked.calibrate on the first such call and
+            reused afterwards. Defaults to None, meaning the calibrated
+            size if there is one and core.chunked.DEFAULT_CHUNK_SIZE
+            otherwise.
+            workers (int | None, optional): If given, the blocks are
+            evaluated by this many threads, which run in parallel while
+            NumPy's ufuncs release the GIL. Defaults to None, meaning
+            they're evaluated by the calling thread.
+            kwargs (Any): The keyword arguments, passed to every block.
+
+        Raises:
+            ValueError: If the function is asynchronous.
+
+        Returns:
+            ndarray: The function's output.
+        """
+
+        from .core import chunked  # pylint: disable=C0415
+
+        plan = get_plan(self.node)
+        run = plan.fuse()
+        if chunk_size == "auto" and plan.chunk_size is None:
+            plan.chunk_size = chunked.calibrate(run, args, kwargs)
+        if chunk_size is None or chunk_size == "auto":
+            chunk_size = plan.chunk_size or chunked.DEFAULT_CHUNK_SIZE
+
+        return chunked.evaluate_chunked(run, args, kwargs, chunk_size, workers)
+
+    def process_map(
+        self,
+        inputs: ftypes.Iterable[ftypes.Any],
+        workers: int | None = None,
+        chunksize: int = 1,
+    ) -> list[ftypes.Any]:
+        """Evaluates the function on each of inputs in a pool of worker
+        processes (see core.processes.process_map), which unlike threads
+        run pure-Python leaves in parallel.
+
+        Functions are pickled by the structure of their expression graph,
+        with leaf callables pickled by reference, so every leaf must be
+        importable by name (e.g. defined at the top level of a module,
+        rather than a lambda).
+
+        Args:
+            inputs (Iterable[Any]): The inputs, each passed to the function
+            as its only argument.
+            workers (int | None, optional): The number of worker processes.
+            Defaults to None, meaning the number of CPUs.
+            chunksize (int, optional): How many inputs are sent to a worker
+            at once. Defaults to 1.
+
+        Returns:
+            list[Any]: The results, in the same order as inputs.
+        """
+
+        from .core import processes  # pylint: disable=C0415
+
+        return processes.process_map(self, inputs, workers, chunksize)
+
+    def evaluate_shared(
+        self,
+        *args: ftypes.Any,
+        workers: int | None = None,
+        chunk_size: int | None = None,
+        out: ftypes.Any = None,
+        **kwargs: ftypes.Any,
+    ) -> ftypes.Any:
+        """Evaluates the function block by block along the first axis of
+        its array arguments in a pool of worker processes, which read
+        their inputs from and write their outputs to shared memory rather
+        than having the arrays pickled (see core.processes.SharedPool).
+
+        Each block is evaluated with evaluate_chunked, so the same
+        restrictions apply, and the function must be picklable
+        (see process_map). This starts a new pool for the call; use
+        shared_pool to reuse one for many calls.
+
+        Args:
+            args (Any): The positional arguments. NumPy arrays with at
+            least one dimension are split into blocks, and must all have
+            the same length; other arguments are passed to every block.
+            Arrays are copied into shared memory, unless they're given as
+            core.processes.SharedArray objects.
+            workers (int | None, optional): The number of worker processes.
+            Defaults to None, meaning the number of CPUs.
+            chunk_size (int | None, optional): The (approximate) number of
+            elements per chunk within each worker. Defaults to None, meaning
+            the calibrated size if there is one (see evaluate_chunked) and
+            core.chunked.DEFAULT_CHUNK_SIZE otherwise.
+            out (SharedArray | None, optional): If given, the output is
+            written into it. Defaults to None.
+            kwargs (Any): The keyword arguments, passed to every block.
+
+        Returns:
+            SharedArray: The function's output, in shared memory, which
+            should be released (e.g. by a with statement) once done with.
+        """
+
+        with self.shared_pool(workers, chunk_size) as pool:
+            return pool.evaluate(*args, out=out, **kwargs)
+
+    def shared_pool(
+        self, workers: int | None = None, chunk_size: int | None = None
+    ) -> ftypes.Any:
+        """Returns a pool of worker processes that evaluate the function on
+        arrays in shared memory, as evaluate_shared does, whose evaluate
+        method can be called any number of times (see
+        core.processes.SharedPool). It should be shut down once done with,
+        e.g. by a with statement.
+
+        Args:
+            workers (int | None, optional): The number of worker processes.
+            Defaults to None, meaning the number of CPUs.
+            chunk_size (int | None, optional): The (approximate) number of
+            elements per chunk within each worker. Defaults to None, meaning
+            the calibrated size if there is one (see evaluate_chunked) and
+            core.chunked.DEFAULT_CHUNK_SIZE otherwise.
+
+        Returns:
+            SharedPool: The pool.
+        """
+
+        from .core import chunked, processes  # pylint: disable=C0415
+
+        if chunk_size is None:
+            chunk_size = get_plan(self.node).chunk_size or chunked.DEFAULT_CHUNK_SIZE
+        return processes.SharedPool(self, workers, chunk_size)
 
     def partial(self, *pargs: ftypes.Any, **pkwargs: ftypes.Any) -> ftypes.Self:
         """Returns a new instance with pargs and pkwargs
@@ -105,41 +568,11 @@ class Function:
 
 
 # adds arithmetic and boolean operators to the class
-for op_name in dir(operator):
-    _op = getattr(operator, op_name)
-
-    # if the operator isn't one of the ones we want,
-    # skip it in the loop
-    if not callable(_op) or _op.__name__ not in ops.operator_symbols:
-        continue
-
-    # checks if the operator is unary
-    if len(signature(_op).parameters) == 1:
-        try:
-            __udunder__ = dunder.DunderUnaryOperator(op_name, _op)
-            #locals()[__udunder__.name] = __udunder__
-            setattr(Function, __udunder__.name, __udunder__)
-        except (NotImplementedError, ValueError):
-            #print(f"Unary operator {op_name} couldn't be added to Function")
-            pass
-        continue
-
-    # otherwise, treat it as a binary one
-    try:
-        __bdunder__ = dunder.DunderBinaryOperator(op_name, _op)
-        #locals()[__bdunder__.name] = __bdunder__
-        setattr(Function, __bdunder__.name, __bdunder__)
-    except (NotImplementedError, ValueError):
-        #print(f"Binary operator {op_name} couldn't be added to Function")
-        continue
-
-    # adds __rop__ as well if it exists
-    if not hasattr(float, op_name[:2] + "r" + op_name[2:]):
-        continue
-    try:
-        __brdunder__ = dunder.DunderBinaryOperator(op_name, _op, True)
-        #locals()[__brdunder__.name] = __brdunder__
-        setattr(Function, __brdunder__.name, __brdunder__)
-    except (NotImplementedError, ValueError):
-        #print(f"Binary operator {rop_name} couldn't be added to Function")
-        pass
+for _name, _op in ops.unary_methods:
+    setattr(Function, _name, dunder.DunderUnaryOperator(_name, _op))
+
+for _name, _op, _reflected in ops.binary_methods:
+    setattr(Function, _name, dunder.DunderBinaryOperator(_name, _op))
+    if _reflected:
+        _rdunder = dunder.DunderBinaryOperator(_name, _op, True)
+        setattr(Function, _rdunder.name, _rdunder)
@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from functionplus import Function
+
+
+async def increment(v: float) -> float:
+    await asyncio.sleep(0.01)
+    return v + 1
+
+
+async def double(v: float) -> float:
+    await asyncio.sleep(0.01)
+    return v * 2
+
+
+async def fail(v: float) -> float:
+    raise ZeroDivisionError
+
+
+class TestAsync:
+    @pytest.fixture(scope="class")
+    def f(self) -> Function:
+        return Function(increment)
+
+    @pytest.fixture(scope="class")
+    def g(self) -> Function:
+        return Function(double)
+
+    def run(self, h: Function, *args):
+        return asyncio.run(h(*args))
+
+    def test_is_async(self, f: Function, g: Function) -> None:
+        x = Function.id("x")
+        assert f.is_async and (f + g).is_async and (x @ f).is_async
+        assert (2 * x + x).composed(3).is_async is False
+        assert f.composed(3).is_async
+
+    def test_operators(self, f: Function, g: Function) -> None:
+        assert self.run(f + g, 1) == 4
+        assert self.run(f * 2 - g / 4 + 1, 3) == 7.5
+        assert self.run(-f, 1) == -2
+        assert self.run(f + Function.id(), 1) == 3
+
+    def test_composition(self, f: Function, g: Function) -> None:
+        assert self.run(f @ g, 1) == 3
+        assert self.run(g @ f, 1) == 4
+        assert self.run((f + g) @ (f * g), 2) == 37
+        assert self.run(f.composed(3), 1) == 4
+        assert self.run(g.composed(2) + 1, 1) == 5
+
+    def test_concurrent(self) -> None:
+        calls = []
+
+        async def slow(v: float) -> float:
+            calls.append(v)
+            await asyncio.sleep(0.05)
+            calls.append(-v)
+            return v
+
+        h = Function(slow) + (Function(slow) @ (Function.id() + 1))
+        assert self.run(h, 1) == 3
+        # the two sides started before either finished
+        assert calls[:2] == [1, 2]
+
+    def test_fused(self, f: Function, g: Function) -> None:
+        h = f * 2 + g
+        assert self.run(h.evaluate_fused, 1) == 6
+        with pytest.raises(ValueError, match="asynchronous"):
+            h.evaluate_chunked(np.arange(3.0))
+
+    def test_errors(self, f: Function) -> None:
+        with pytest.raises(ZeroDivisionError):
+            self.run(f + Function(fail), 1)
+        with pytest.raises(ZeroDivisionError):
+            self.run(Function(fail) @ f, 1)
+
+    def test_cached(self, f: Function, g: Function) -> None:
+        calls = []
+
+        async def counted(v: float) -> float:
+            calls.append(v)
+            return await increment(v)
+
+        c = Function(counted).cached()
+        assert c.is_async and (c + 1).is_async
+        assert self.run(c, 1) == self.run(c, 1) == 2
+        assert self.run(c + 1, 1) == 3
+        assert calls == [1]
+        assert c.function.cache_info().hits == 2
+
+        h = (f + g).cached()
+        assert self.run(h, 1) == self.run(h, 1) == 4
+
+    def test_partial(self, f: Function, g: Function) -> None:
+        add = Function(increment).partial(2)
+        assert add.is_async and self.run(add + 1) == 4
+        h = (f * g).partial(1)
+        assert h.is_async and self.run(h - 1) == 3
@@ -0,0 +1,72 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from functionplus import Function
+
+
+def fail(v):
+    raise ZeroDivisionError
+
+
+async def gather(f: Function, *calls):
+    return await asyncio.gather(*[f(*args) for args in calls])
+
+
+class TestBatched:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    def test_batched(self, x: Function) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7
+        b = h.batched(max_batch=16)
+        inputs = np.linspace(-2, 2, 100)
+        results = asyncio.run(gather(b, *[(v,) for v in inputs]))
+        np.testing.assert_array_equal(results, h(inputs))
+        assert b.is_async
+        assert b.function.calls == 100
+        assert b.function.batches == 7
+
+    def test_delay(self, x: Function) -> None:
+        b = (x + 1).batched(max_delay_ms=5)
+
+        async def staggered():
+            first = asyncio.ensure_future(b(1))
+            await asyncio.sleep(0)
+            second = await b(2)
+            return await first, second
+
+        assert asyncio.run(staggered()) == (2, 3)
+        assert b.function.batches == 1
+        assert asyncio.run(gather(b, (3,))) == [4]
+        assert b.function.batches == 2
+
+    def test_arguments(self) -> None:
+        b = Function(np.arctan2).batched()
+        results = asyncio.run(gather(b, (1.0, 2.0), (3.0, 4.0)))
+        assert results == [np.arctan2(1.0, 2.0), np.arctan2(3.0, 4.0)]
+        with pytest.raises(TypeError):
+            asyncio.run(gather(b, (1.0,)))
+
+    def test_async_function(self, x: Function) -> None:
+        async def double(v):
+            await asyncio.sleep(0)
+            return v * 2
+
+        b = (Function(double) + x).batched()
+        assert asyncio.run(gather(b, (1,), (2,))) == [3, 6]
+
+    def test_errors(self, x: Function) -> None:
+        b = (Function(fail) + x).batched()
+        with pytest.raises(ZeroDivisionError):
+            asyncio.run(gather(b, (0,), (1,)))
+        with pytest.raises(ValueError):
+            asyncio.run(gather(Function(lambda v: v[:1]).batched(), (1,), (2,)))
+        with pytest.raises(ValueError):
+            x.batched(max_batch=0)
+
+    def test_composition(self, x: Function) -> None:
+        b = (x * 2).batched() + 1
+        assert asyncio.run(gather(b, (1,), (2,))) == [3, 5]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from functionplus import Function
+from functionplus.core.evaluator import get_plan
+
+
+class TestFused:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    @pytest.fixture(scope="class")
+    def inputs(self) -> np.ndarray:
+        return np.linspace(-2, 2, 1_000)
+
+    def test_buffers(self, x: Function, inputs: np.ndarray) -> None:
+        h = 3 * x**3 - x**2 / 7 + 2 * (np.cos @ x) + abs(-x) * x
+        expected = h(inputs)
+        assert_array_equal(h.evaluate_fused(inputs), expected)
+        assert_array_equal(h.evaluate_fused(inputs), expected)
+
+        layout = next(iter(get_plan(h.node).fused.layouts.values()))
+        assert sum(entry is not None for entry in layout.entries) >= 10
+        assert len(layout.buffers) <= 3
+
+    def test_inputs_unchanged(self, x: Function, inputs: np.ndarray) -> None:
+        h = -(Function.id() @ (x + 1)) * 2 + x
+        copy = inputs.copy()
+        expected = h(inputs)
+        for _ in range(2):
+            assert_array_equal(h.evaluate_fused(inputs), expected)
+        assert_array_equal(inputs, copy)
+
+    def test_aliasing(self, x: Function, inputs: np.ndarray) -> None:
+        # the identity returns its (buffered) input, which must not
+        # be overwritten while the identity's output is still needed
+        h = (Function.id() @ (x + 1)) * 2 + (x + 1) * 3
+        expected = h(inputs)
+        for _ in range(2):
+            assert_array_equal(h.evaluate_fused(inputs), expected)
+
+    def test_mismatch(self, x: Function, inputs: np.ndarray) -> None:
+        toggle = []
+
+        def varying(v):
+            toggle.append(None)
+            return v.astype(np.float32) if len(toggle) % 2 else v
+
+        h = Function(varying) * 2 + x
+        for i in range(4):
+            v = inputs.astype(np.float32) if i % 2 == 0 else inputs
+            assert_array_equal(h.evaluate_fused(inputs), v * 2 + inputs)
+
+    def test_fallback(self, x: Function) -> None:
+        h = x * 2 + 1
+        assert h.evaluate_fused(3) == 7
+        assert (x * 2).evaluate_fused([1]) == [1, 1]
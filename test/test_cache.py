@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from functionplus import Function
+from functionplus.core.cache import make_key
+
+
+class TestCache:
+    @pytest.fixture
+    def counted(self) -> tuple[Function, list]:
+        calls = []
+
+        def f(x):
+            calls.append(x)
+            return np.sin(x)
+
+        return Function(f), calls
+
+    def test_scalars(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = f.cached()
+        assert h(1.0) == h(1.0) == np.sin(1.0)
+        assert h(1) == np.sin(1)
+        assert len(calls) == 2
+        info = h.function.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 2, 2)
+
+    def test_signed_zeros(self) -> None:
+        h = Function(lambda v: np.copysign(1, v)).cached()
+        assert h(0.0) == 1.0
+        assert h(-0.0) == -1.0
+        assert h(np.float64(-0.0)) == -1.0
+
+    def test_arrays(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = f.cached()
+        inputs = np.arange(6.0).reshape(2, 3)
+        assert_allclose(h(inputs), np.sin(inputs))
+        assert_allclose(h(inputs.copy()), np.sin(inputs))
+        assert_allclose(h(inputs.T), np.sin(inputs.T))
+        assert len(calls) == 2
+        assert not h(inputs).flags.writeable
+
+    @pytest.mark.parametrize("leaf", [np.asarray, lambda v: v])
+    def test_inputs_stay_writable(self, leaf) -> None:
+        inputs = np.arange(3.0)
+        h = Function(leaf).cached()
+        assert not h(inputs).flags.writeable
+        assert not h(inputs).flags.writeable
+        assert inputs.flags.writeable
+        assert Function.id().cached()(inputs) is not inputs
+
+    @pytest.mark.parametrize("leaf", [np.asarray, lambda v: v[::2]])
+    def test_aliased_results(self, leaf) -> None:
+        inputs = np.arange(4.0)
+        h = Function(leaf).cached()
+        h(inputs)
+        inputs[:] = 100
+        assert_allclose(h(np.arange(4.0)), leaf(np.arange(4.0)))
+
+    def test_identity(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = f.cached(arrays="identity")
+        inputs = np.arange(3.0)
+        h(inputs)
+        h(inputs)
+        h(inputs.copy())
+        assert len(calls) == 2
+
+    @pytest.mark.parametrize("policy, kept", [("lru", 0), ("fifo", 1)])
+    def test_eviction(self, counted: tuple[Function, list], policy, kept) -> None:
+        f, calls = counted
+        h = f.cached(maxsize=2, policy=policy)
+        for x in [0, 1, 0, 2]:
+            h(x)
+        calls.clear()
+        h(kept)
+        assert not calls
+        assert h.function.cache_info().evictions == 1
+
+    def test_unhashable(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = f.cached()
+        h([1, 2])
+        h([1, 2])
+        assert len(calls) == 2
+        assert make_key(([1, 2],), {}) is None
+
+    def test_composite(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = (f * 2 + 1).cached()
+        assert h(0.5) == h(0.5) == 2 * np.sin(0.5) + 1
+        assert len(calls) == 1
+        assert h.name == "((f * 2) + 1)"
+        assert repr(h.function) == "<Memoized ((f * 2) + 1)>"
+        assert h.function.components == h.components == {f.function}
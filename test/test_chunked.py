@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from functionplus import Function
+from functionplus.core import chunked, threads
+from functionplus.core.evaluator import get_plan
+
+
+class TestChunked:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    @pytest.fixture(
+        scope="class",
+        params=[np.linspace(-2, 2, 10_001), np.arange(3_000.0).reshape(1_000, 3)],
+    )
+    def inputs(self, request: pytest.FixtureRequest) -> np.ndarray:
+        return request.param
+
+    @pytest.mark.parametrize("chunk_size", [None, 1, 100, 1 << 20])
+    def test_chunked(self, x: Function, inputs: np.ndarray, chunk_size) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7 + abs(-x)
+        assert_array_equal(h.evaluate_chunked(inputs, chunk_size=chunk_size), h(inputs))
+
+    @pytest.mark.parametrize("workers", [1, 2, 8])
+    def test_workers(self, x: Function, inputs: np.ndarray, workers: int) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7 + abs(-x)
+        assert_array_equal(
+            h.evaluate_chunked(inputs, chunk_size=100, workers=workers), h(inputs)
+        )
+        with pytest.raises(ValueError):
+            Function(np.sum).evaluate_chunked(inputs, chunk_size=64, workers=workers)
+
+    def test_shared_executor(self, x: Function, inputs: np.ndarray) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7 + abs(-x)
+        executor = threads.shared_executor()
+        # chunked evaluations running on every thread of the shared
+        # executor evaluate their own chunks rather than wait for it
+        futures = [
+            executor.submit(h.evaluate_chunked, inputs, chunk_size=100, workers=8)
+            for _ in range(64)
+        ]
+        for future in futures:
+            assert_array_equal(future.result(timeout=60), h(inputs))
+
+    def test_in_place(self, x: Function, inputs: np.ndarray) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7 + abs(-x)
+        fused = get_plan(h.node).fuse()
+        in_place = []
+
+        def run(args, kwargs, out):
+            result = fused(args, kwargs, out=out)
+            in_place.append(result is out)
+            return result
+
+        run.writes_out = True
+        out = np.empty_like(inputs)
+        chunked.evaluate_chunked(run, (inputs,), {}, 300, out=out)
+        assert_array_equal(out, h(inputs))
+        # the first call with each shape is traced, so can't be in place
+        assert in_place[0] is False and all(in_place[1:-1])
+
+        # steps that aren't ufuncs fall back to copying
+        g = Function(lambda v: v * 2) @ h
+        assert_array_equal(
+            chunked.evaluate_chunked(get_plan(g.node).fuse(), (inputs,), {}, 300),
+            g(inputs),
+        )
+
+    def test_invalid_workers(self, x: Function, inputs: np.ndarray) -> None:
+        with pytest.raises(ValueError):
+            x.evaluate_chunked(inputs, workers=0)
+
+    def test_arguments(self, inputs: np.ndarray) -> None:
+        h = Function(np.arctan2) * 2
+        assert_allclose(
+            h.evaluate_chunked(inputs, inputs[::-1], chunk_size=64),
+            h(inputs, inputs[::-1]),
+        )
+        assert_array_equal(
+            h.evaluate_chunked(inputs, 0.5, chunk_size=64), h(inputs, 0.5)
+        )
+
+    def test_not_elementwise(self, x: Function, inputs: np.ndarray) -> None:
+        with pytest.raises(ValueError):
+            Function(np.sum).evaluate_chunked(inputs, chunk_size=64)
+        with pytest.raises(ValueError):
+            x.evaluate_chunked(inputs, inputs[:10])
+
+    def test_calibrate(self, x: Function, inputs: np.ndarray) -> None:
+        h = x * 2 + 1
+        assert_array_equal(h.evaluate_chunked(inputs, chunk_size="auto"), h(inputs))
+        assert h.node.plan.chunk_size in chunked.CANDIDATES
@@ -0,0 +1,114 @@
+import operator
+import sys
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from functionplus import Function
+from functionplus.core import codegen, evaluator, graph, ops
+from functionplus.core.evaluator import get_plan
+
+
+class TestEvaluator:
+    @pytest.fixture
+    def counted(self) -> tuple[Function, list]:
+        calls = []
+
+        def f(x):
+            calls.append(x)
+            return x + 1
+
+        return Function(f), calls
+
+    def test_shared(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = f * f + f
+        assert h(2) == 12
+        assert calls == [2]
+
+    def test_structural(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        x = Function.id("x")
+        h = (2 * f + x) * (2 * f + x)
+        assert h(1) == 25
+        assert calls == [1]
+        assert len(get_plan(h.node).steps) == 5
+
+    def test_composed_context(self, counted: tuple[Function, list]) -> None:
+        f, calls = counted
+        h = (f @ f) + f
+        assert h(1) == 5
+        assert calls == [1, 2]
+
+    @pytest.mark.parametrize("op_name", sorted(ops.binary_symbols))
+    def test_operands_evaluated_once(
+        self, counted: tuple[Function, list], op_name: str
+    ) -> None:
+        f, calls = counted
+        op = getattr(operator, op_name)
+        g = Function(lambda x: calls.append(-x) or x - 1)
+        cases = [
+            (op(f, g), op(4, 2), [3, -3]),
+            (op(f, 2), op(4, 2), [3]),
+            # reflected, e.g. 2 - f
+            (op(2, f), op(2, 4), [3]),
+        ]
+        for h, expected, expected_calls in cases:
+            for compiled in (False, True):
+                if compiled:
+                    h.compile()
+                calls.clear()
+                assert h(3) == expected
+                assert calls == expected_calls
+
+    def test_specialized_steps(self) -> None:
+        x = Function.id("x")
+        h = (x - 2) * (2 - x) + abs(x)
+        kinds = [call[1] for call in get_plan(h.node).calls]
+        assert kinds == [
+            evaluator.CALL_ARGS,
+            evaluator.CALL_CONST_RIGHT,
+            evaluator.CALL_CONST_LEFT,
+            evaluator.CALL_TWO,
+            evaluator.CALL_ONE,
+            evaluator.CALL_TWO,
+        ]
+        assert h(5) == -9 + 5
+
+    def test_signed_zero(self) -> None:
+        x = Function.id("x")
+        h = x * 0.0 + x * -0.0
+        assert len(get_plan(h.node).steps) == 4
+        assert_allclose(h(np.arange(3.0)), np.zeros(3))
+
+    def test_codegen(self) -> None:
+        x = Function.id("x")
+        h = -x * 2 + np.cos
+        source, params = codegen.generate_source(get_plan(h.node))
+        assert "= -v0" in source
+        assert "* v" in source
+        assert sum(1 for name in params if name.startswith("f")) == 2
+        assert_allclose(h.compile()(1.5), -3 + np.cos(1.5))
+        # names are only used once rendered, as rendering can be slow
+        assert h.node.plan.compiled.__name__ == "compiled"
+        g = x * 4
+        assert g.name == "(x * 4)"
+        assert g.compile().node.plan.compiled.__name__ == g.name
+
+    @pytest.fixture(scope="class")
+    def depth(self) -> int:
+        return 10 * sys.getrecursionlimit()
+
+    def test_deep_composition(self, depth: int) -> None:
+        f = Function(lambda v: v + 1)
+        node = f.node
+        for _ in range(depth):
+            node = graph.CompositionNode(f.node, node)
+        assert Function(node, "deep")(0) == depth + 1
+
+    def test_deep_operators(self, depth: int) -> None:
+        node = Function.id("x").node
+        for i in range(depth):
+            node = graph.BinaryNode(operator.add, node, graph.Constant(i % 2))
+        assert Function(node, "deep")(0) == depth // 2
@@ -1,4 +1,6 @@
+import inspect
 import operator
+import sys
 
 import numpy as np
 import pytest
@@ -63,7 +65,121 @@ class TestFunction:
             == set([x.function, g.function, np.cos])
         )
 
+    def test_composed(self, x: Function, inputs) -> None:
+        f = Function(np.cos) @ (x / 2 + 1)
+        h = f.composed(3)
+        assert h.name == f"{f.name}^3"
+        assert f.composed(1) is f
+        assert_allclose(h(inputs), f(f(f(inputs))))
+        assert_allclose(f.composed(0)(inputs), inputs)
+        assert_allclose((h + h @ h)(inputs), f.composed(3)(inputs) + f.composed(6)(inputs))
+
+    def test_compile(self, f: Function, g: Function, inputs) -> None:
+        h = (f @ g + 2 * f - abs(g)) / (1 + f)
+        expected = h(inputs)
+        assert h.compile() is h
+        assert h.node.plan.compiled is not None
+        assert_allclose(h(inputs), expected)
+
+    def test_names(self, x: Function) -> None:
+        h = (2 - x) * Function(np.cos) @ (x + 1)
+        assert h._name is None and h._doc is None
+        assert h.name == "(x + 1); ((2 - x) * cos)"
+        assert h.__doc__ == f"Applies the functions {h.name} from left to right."
+        assert (-x).__doc__ == "Computes (- x)(...)."
+
+        h.name = "h"
+        assert (h + 1).name == "(h + 1)"
+        assert h.composed(2).__doc__ == "Applies h a total of 2 times."
+
+    def test_name_truncation(
+        self, x: Function, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(Function, "max_name_length", 12)
+        h = x
+        for _ in range(10_000):
+            h = h - 1
+        assert h.name == "(((((((((..."
+
+    def test_operator_cache(self, x: Function) -> None:
+        class SubFunction(Function):
+            """A subclass of Function."""
+
+        assert Function.__add__ is Function.__add__
+        assert Function.__rmatmul__ is Function.__rmatmul__
+        assert SubFunction.__add__ is not Function.__add__
+        assert isinstance(SubFunction(x) + 1, SubFunction)
+        assert isinstance(1 @ SubFunction(x), SubFunction)
+        assert SubFunction.__doc__ == "A subclass of Function."
+        assert (SubFunction(x) + 1).__doc__ == "Computes (x + 1)(...)."
+
+    def test_lazy_components(self, f: Function, g: Function, x: Function) -> None:
+        h = f
+        for i in range(1_000):
+            h = h * g - i
+        assert h._components is None
+        assert h.components == set([x.function, g.function])
+        assert h.cached().components == h.components
+        assert (h.composed(3) + np.cos).components == set([x, g, np.cos])
+
+    def test_lazy_wrapper_names(self, x: Function) -> None:
+        h = x * 2 - 1
+        wrappers = [h.cached(), h.batched(), h.concurrent(), h.single_flight()]
+        h.compile()
+        assert h._name is None and h._doc is None
+        for wrapped in wrappers:
+            assert wrapped.name == h.name == "((x * 2) - 1)"
+        assert h.cached().__doc__ == h.__doc__ == "Computes ((x * 2) - 1)(...)."
+        assert repr(h.cached().function) == "<Memoized ((x * 2) - 1)>"
+        memoized = h.cached().function
+        memoized.__doc__ = "Memoized."
+        assert memoized.__doc__ == "Memoized." and h.__doc__ != "Memoized."
+
+    def test_fused(self, f: Function, g: Function, inputs) -> None:
+        h = (f @ g + 2 * f - abs(g)) / (1 + f) > g
+        expected = h(inputs)
+        for _ in range(2):
+            assert_allclose(h.evaluate_fused(inputs), expected)
+
+    def test_constant_composition(self, x: Function) -> None:
+        inputs = np.arange(10_000.0)
+        out = (2.5 @ x)(inputs)
+        assert_allclose(out, np.full_like(inputs, 2.5))
+        assert out.strides == (0,) and not out.flags.writeable
+        assert np.array(out).flags.writeable
+        assert_allclose(((2.5 @ x) * x)(inputs), 2.5 * inputs)
+
+        assert (2.5 @ x)(3) == 2 and (2.5 @ x)(3.0) == 2.5
+        assert (2.5 @ x)([1, 2]).tolist() == [2, 2]
+        assert (np.float32(2) @ x)(inputs).dtype == np.float32
+        assert ("a" @ x)(inputs).dtype == object
+
     def test_partial(self, inputs) -> None:
         h = Function(np.arctan2)
         h_p = h.partial(np.pi / 6)
         assert_allclose(h_p(inputs), h(np.pi / 6, inputs))
+
+    def test_slots(self, x: Function) -> None:
+        def square(v: float) -> float:
+            """Squares v."""
+            return v * v
+
+        f = Function(square)
+        h = (x + 1) * f
+        for obj in (x.node, h.node, h.node.left.right):
+            assert not hasattr(obj, "__dict__")
+
+        assert f.__doc__ == "Squares v."
+        assert f.__qualname__ == square.__qualname__
+        assert f.__annotations__ == square.__annotations__
+        assert f.__wrapped__ is square
+        assert f.__module__ == square.__module__ == __name__
+        assert h.__module__ == Function.__module__ == "functionplus.function"
+        assert inspect.getmodule(f) is sys.modules[__name__]
+        assert not hasattr(h, "__wrapped__")
+        assert f.cached().maxsize == f.cached().function.maxsize
+
+        h.__doc__ = "Multiplies."
+        assert Function(h).__doc__ == "Multiplies."
+        f.units = h.units = "m"
+        assert f.units == h.units == "m" and not hasattr(square, "units")
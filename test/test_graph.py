@@ -0,0 +1,69 @@
+import operator
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from functionplus import Function
+from functionplus.core import graph
+
+
+class TestGraph:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    def test_leaf(self, x: Function) -> None:
+        assert isinstance(x.node, graph.Leaf)
+        assert x.node.function is x.function
+
+    def test_binary(self, x: Function) -> None:
+        h = x * 2
+        assert isinstance(h.node, graph.BinaryNode)
+        assert h.node.op is operator.mul
+        assert h.node.left is x.node
+        assert isinstance(h.node.right, graph.Constant)
+        assert h.node.right.value == 2
+
+    def test_reflected(self, x: Function) -> None:
+        h = 2 - x
+        assert isinstance(h.node.left, graph.Constant)
+        assert h.node.right is x.node
+        assert h.name == "(2 - x)"
+        assert h(5) == -3
+
+    def test_composition(self, x: Function) -> None:
+        h = Function(np.cos) @ (x + 1)
+        assert isinstance(h.node, graph.CompositionNode)
+        assert h.node.inner.children[0] is x.node
+        assert_allclose(h(np.arange(3)), np.cos(np.arange(3) + 1))
+
+    def test_from_node(self, x: Function) -> None:
+        h = Function(graph.UnaryNode(operator.neg, x.node), "-x")
+        assert h.name == "-x"
+        assert h(3) == -3
+        assert h.node(3) == -3
+
+    def test_copy(self, x: Function) -> None:
+        h = x * 2 + 1
+        h(1)
+        node = h.node.labeled("h")
+        assert node.label == "h" and node.plan is None
+        assert node.op is h.node.op and node.children == h.node.children
+        assert h.node.label is None and h.node.plan is not None
+
+    def test_postorder(self, x: Function) -> None:
+        g = x + 1
+        h = (g * g).node
+        order = list(graph.postorder(h))
+        assert order[-1] is h and len(order) == len(set(map(id, order))) == 4
+        for node in order:
+            for child in node.children:
+                assert order.index(child) < order.index(node)
+        assert list(graph.postorder(h, lambda node: ())) == [h]
+
+    def test_render(self, x: Function) -> None:
+        g = x + 1
+        h = g * g - g
+        assert graph.render(h.node) == "(((x + 1) * (x + 1)) - (x + 1))"
+        assert graph.render(h.node, max_length=9) == "(((x +..."
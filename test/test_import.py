@@ -0,0 +1,94 @@
+import inspect
+import operator
+import subprocess
+import sys
+
+import pytest
+
+from functionplus import Function
+from functionplus.core import dunder, ops
+
+# modules that importing functionplus shouldn't import
+LAZY_MODULES = ["numpy", "asyncio", "concurrent.futures", "multiprocessing", "inspect"]
+
+
+def import_times(module: str = "functionplus") -> dict[str, int]:
+    """Imports module in a fresh interpreter with -X importtime,
+    returning the cumulative time (in microseconds) of each module."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestImport:
+    def test_import_time(self) -> None:
+        # importing functionplus used to import numpy, so took longer than
+        # numpy itself
+        times = import_times()
+        for module in LAZY_MODULES:
+            assert module not in times
+
+    @pytest.mark.parametrize(
+        "expression", ["(2.5 @ x)(1.0)", "x.optimize()", "(x + 1).compile()(1)"]
+    )
+    def test_numpy_imported_on_demand(self, expression: str) -> None:
+        code = (
+            "import sys\n"
+            "from functionplus import Function\n"
+            "x = Function.id('x') ** 0.5\n"
+            f"{expression}\n"
+            "print('numpy' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        expected = expression != "(x + 1).compile()(1)"
+        assert result.stdout.strip() == str(expected)
+
+    def test_operator_table(self) -> None:
+        """Checks the static operator table against the operator module."""
+
+        unary, binary, reflected = set(), set(), set()
+        for name in dir(operator):
+            op = getattr(operator, name)
+            if not callable(op) or op.__name__ not in ops.operator_symbols:
+                continue
+            try:
+                ops.operator_doc(op)
+            except NotImplementedError:  # e.g. operator._abs, the builtin
+                continue
+            if len(inspect.signature(op).parameters) == 1:
+                unary.add((name, op))
+                continue
+            binary.add((name, op))
+            if name.startswith("__") and hasattr(int, name[:2] + "r" + name[2:]):
+                reflected.add(name)
+
+        assert set(ops.unary_methods) == unary
+        assert {(name, op) for name, op, _ in ops.binary_methods} == binary
+        assert {name for name, _, is_rop in ops.binary_methods if is_rop} == reflected
+
+        for name, _ in ops.unary_methods:
+            assert isinstance(Function.__dict__[name], dunder.DunderUnaryOperator)
+        for name in reflected:
+            rname = name[:2] + "r" + name[2:]
+            assert Function.__dict__[rname].is_rop
+
+    def test_reflected_bitwise(self) -> None:
+        x = Function.id("x")
+        assert (6 & x)(3) == 2 and (6 ^ x)(3) == 5 and (6 | x)(3) == 7
+
+    def test_operator_docs(self) -> None:
+        assert Function.__sub__.__doc__ == "Same as self - other."
+        assert Function.__rsub__.__doc__ == "Same as other - self."
@@ -0,0 +1,159 @@
+import multiprocessing
+import operator
+import pickle
+import sys
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from functionplus import Function
+from functionplus.core import processes
+
+
+def square(v: float) -> float:
+    return v * v
+
+
+class TestPickle:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    def roundtrip(self, f: Function) -> Function:
+        return pickle.loads(pickle.dumps(f))
+
+    def test_expressions(self, x: Function) -> None:
+        f = Function(square)
+        for h in [
+            f,
+            3 * x**2 - (np.cos @ x) / 7 + abs(-x),
+            f @ (x + 1) @ f,
+            1 / f - f,
+            f.composed(3),
+            Function(operator.pow).partial(2) @ f,
+            f.cached(),
+        ]:
+            copy = self.roundtrip(h)
+            assert copy.name == h.name
+            assert copy(1.5) == h(1.5)
+
+    def test_leaves_by_reference(self, x: Function) -> None:
+        copy = self.roundtrip(Function(square) + np.cos @ x)
+        assert copy.components == {square, np.cos, x.function}
+
+    def test_compiled(self, x: Function) -> None:
+        h = (x * 2 + 1).compile()
+        h(1)
+        copy = self.roundtrip(h)
+        assert copy.node.plan is None
+        assert copy(1) == 3
+
+    def test_shared_nodes(self, x: Function) -> None:
+        g = x + 1
+        copy = self.roundtrip(g * g)
+        assert copy.node.left is copy.node.right
+
+    def test_deep(self, x: Function) -> None:
+        h = x
+        for i in range(10 * sys.getrecursionlimit()):
+            h = h + x * i
+        assert self.roundtrip(h)(1) == h(1)
+
+    def test_unpicklable_leaf(self) -> None:
+        with pytest.raises((pickle.PicklingError, AttributeError)):
+            pickle.dumps(Function(lambda v: v) + 1)
+
+    def test_cache_not_pickled(self) -> None:
+        f = Function(square).cached()
+        f(2)
+        assert self.roundtrip(f).function.cache_info().currsize == 0
+
+
+class TestProcessMap:
+    def test_process_map(self) -> None:
+        h = Function(square) * 2 + 1
+        assert h.process_map(range(10), workers=2) == [h(i) for i in range(10)]
+
+    def test_spawn(self) -> None:
+        h = Function(square) - 1
+        context = multiprocessing.get_context("spawn")
+        assert processes.process_map(h, [1, 2, 3], 1, mp_context=context) == [0, 3, 8]
+
+    def test_unpicklable(self) -> None:
+        with pytest.raises((pickle.PicklingError, AttributeError)):
+            Function(lambda v: v).process_map([1], workers=1)
+
+
+class TestShared:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    @pytest.fixture(
+        scope="class",
+        params=[np.linspace(-2, 2, 10_001), np.arange(3_000.0).reshape(1_000, 3)],
+    )
+    def inputs(self, request: pytest.FixtureRequest) -> np.ndarray:
+        return request.param
+
+    def test_shared(self, x: Function, inputs: np.ndarray) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7 + abs(-x)
+        with h.evaluate_shared(inputs, workers=2, chunk_size=100) as out:
+            assert isinstance(out, processes.SharedArray)
+            assert_array_equal(out.array, h(inputs))
+
+    def test_pool(self, x: Function, inputs: np.ndarray) -> None:
+        h = x * 2 + 1
+        with h.shared_pool(workers=2) as pool:
+            with processes.SharedArray.copy_of(inputs) as shared:
+                with pool.evaluate(shared) as first:
+                    assert_array_equal(first.array, h(inputs))
+                out = processes.SharedArray(inputs.shape, inputs.dtype)
+                assert pool.evaluate(shared, out=out) is out
+                assert_array_equal(out.array, h(inputs))
+                # views outlive the block's release
+                view = out.array[::2]
+                out.release()
+                out.release()
+                assert_array_equal(view, h(inputs)[::2])
+
+            with pytest.raises(ValueError):
+                pool.evaluate(inputs, out=processes.SharedArray((3,), float))
+
+    def test_arguments(self, inputs: np.ndarray) -> None:
+        h = Function(np.arctan2) * 2
+        assert_allclose(
+            h.evaluate_shared(inputs, inputs[::-1], workers=2), h(inputs, inputs[::-1])
+        )
+        with h.evaluate_shared(inputs, 0.5, workers=2) as out:
+            assert_array_equal(out, h(inputs, 0.5))
+
+    def test_constant_composition(self, x: Function, inputs: np.ndarray) -> None:
+        h = (2.5 @ x) * x
+        assert_array_equal(h.evaluate_shared(inputs, workers=2), h(inputs))
+
+    def test_blocks_unlinked(
+        self, x: Function, inputs: np.ndarray, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        names = []
+        create = processes.SharedMemory
+
+        def recording(*args, **kwargs):
+            block = create(*args, **kwargs)
+            names.append(block.name)
+            return block
+
+        monkeypatch.setattr(processes, "SharedMemory", recording)
+        with pytest.raises(ValueError):
+            Function(np.sum).evaluate_shared(inputs, workers=2)
+        with (x + 1).evaluate_shared(inputs, workers=1):
+            pass
+        assert names
+        for name in names:
+            with pytest.raises(FileNotFoundError):
+                create(name)
+
+    def test_object_arrays(self, x: Function) -> None:
+        with pytest.raises(ValueError):
+            x.evaluate_shared(np.array([1, "a"], dtype=object), workers=1)
@@ -0,0 +1,134 @@
+import operator
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from functionplus import Function
+from functionplus.core import graph
+from functionplus.core.evaluator import get_plan
+
+
+class TestFolding:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    @pytest.mark.parametrize(
+        "build, constant",
+        [
+            (lambda x: 2.0 * (3.0 * x), 6.0),
+            (lambda x: (x + 1.0) + 2.0, 3.0),
+            (lambda x: (x * 2.0) * 0.5, 1.0),
+            (lambda x: 1.0 + (2.0 + x), 3.0),
+        ],
+    )
+    def test_reassociation(self, x: Function, build, constant) -> None:
+        h = build(x)
+        assert len(get_plan(h.node).steps) == 2
+        assert constant in [
+            child.value
+            for child in h.node.children
+            if isinstance(child, graph.Constant)
+        ]
+        assert_allclose(h(np.arange(4.0)), build(np.arange(4.0)))
+
+    def test_non_associative(self, x: Function) -> None:
+        h = (x - 1) - 2
+        assert len(get_plan(h.node).steps) == 3
+        assert h(0) == -3
+
+    @pytest.mark.parametrize("dtype, factor", [(np.int8, 100), (np.int16, 200)])
+    def test_narrow_integers(self, x: Function, dtype, factor: int) -> None:
+        h = (x * factor) * factor
+        assert len(get_plan(h.node).steps) == 3
+        inputs = np.arange(3, dtype=dtype)
+        with np.errstate(over="ignore"):
+            expected = (inputs * factor) * factor
+        assert_allclose(h(inputs), expected)
+        assert h(inputs).dtype == dtype
+        # bools combined bitwise stay bools, so they're still merged
+        assert len(get_plan(((x & True) & False).node).steps) == 2
+
+    def test_unsafe(self, x: Function) -> None:
+        h = (x * 1e200) * 1e200
+        assert len(get_plan(h.node).steps) == 3
+        assert h(1e-300) == pytest.approx(1e100)
+
+    def test_constant_subtree(self, x: Function) -> None:
+        two_times_three = graph.BinaryNode(
+            operator.mul, graph.Constant(2), graph.Constant(3)
+        )
+        h = Function(graph.BinaryNode(operator.add, x.node, two_times_three), "x + 6")
+        assert len(get_plan(h.node).steps) == 2
+        assert h(1) == 7
+
+    def test_error_deferred(self, x: Function) -> None:
+        zero_division = graph.BinaryNode(
+            operator.truediv, graph.Constant(1), graph.Constant(0)
+        )
+        h = Function(graph.BinaryNode(operator.add, x.node, zero_division), "x + 1/0")
+        with pytest.raises(ZeroDivisionError):
+            h(1)
+
+
+class TestSimplify:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    @pytest.mark.parametrize(
+        "build, change",
+        [
+            (lambda x: x * 1, "x * 1 -> x"),
+            (lambda x: 0 + x, "0 + x -> x"),
+            (lambda x: x**1, "x ** 1 -> x"),
+            (lambda x: -(-x), "-(-x) -> x"),
+            (lambda x: Function.id() @ x, "id @ f -> f"),
+        ],
+    )
+    def test_identities(self, x: Function, build, change: str) -> None:
+        report = []
+        h = build(x).optimize(report)
+        assert report == [change]
+        assert h.function is x.function
+
+    def test_strength_reduction(self, x: Function) -> None:
+        report = []
+        h = (Function(np.exp) ** 2 + x**0.5 + x / 4).optimize(report)
+        assert report == [
+            "x ** 2 -> x * x",
+            "x ** 0.5 -> sqrt(x)",
+            "f @ id -> f",
+            "x / 4 -> x * 0.25",
+        ]
+        inputs = np.linspace(0, 4)
+        assert_allclose(h(inputs), np.exp(inputs) ** 2 + inputs**0.5 + inputs / 4)
+        assert len(get_plan(h.node).steps) == 7
+
+    def test_unchanged(self, x: Function) -> None:
+        h = x * 2 + 1
+        report = []
+        assert h.optimize(report) is h
+        assert not report
+
+    def test_integers(self, x: Function) -> None:
+        inputs = np.arange(-3, 4)
+        for h in [x / 1, x * 1.0, 1.0 * x, x + 0.0, x - 0.0, x**1.0, x**2.0]:
+            value = h.optimize()(inputs)
+            assert value.dtype == h(inputs).dtype == np.float64
+            assert_allclose(value, h(inputs))
+            assert type(h.optimize()(3)) is float
+        assert (x / 1).optimize()(3) == 3.0
+        assert (x * 1 + 0).optimize().function is x.function
+        assert ((x / 1) // 2).optimize()(inputs).dtype == np.float64
+
+    def test_booleans(self, x: Function) -> None:
+        h = (x > 1) * True
+        assert h.optimize() is h
+
+    def test_unsigned(self, x: Function) -> None:
+        h = abs(-x)
+        assert h.optimize() is h
+        inputs = np.array([1, 2, 3], dtype=np.uint8)
+        assert_allclose(h.optimize()(inputs), [255, 254, 253])
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from functionplus import Function
+
+
+class TestSingleFlight:
+    def test_threads(self) -> None:
+        calls = []
+        release = threading.Event()
+
+        def slow(v):
+            calls.append(v)
+            release.wait(5)
+            return v * 2
+
+        f = Function(slow).single_flight()
+        with ThreadPoolExecutor(8) as executor:
+            futures = [executor.submit(f, 3) for _ in range(7)]
+            futures.append(executor.submit(f, 4))
+            time.sleep(0.1)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert results == [6] * 7 + [8]
+        assert sorted(calls) == [3, 4]
+        assert f.function.shared == 6
+        # nothing is retained once the calls are done
+        assert f(3) == 6 and calls.count(3) == 2
+
+    def test_errors(self) -> None:
+        release = threading.Event()
+
+        def fail(v):
+            release.wait(5)
+            raise ZeroDivisionError
+
+        f = (Function(fail) + 1).single_flight()
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(f, 1) for _ in range(4)]
+            time.sleep(0.1)
+            release.set()
+            for future in futures:
+                with pytest.raises(ZeroDivisionError):
+                    future.result()
+        assert not f.function._flights
+
+    def test_unkeyable(self) -> None:
+        f = Function(len).single_flight()
+        assert f([1, 2]) == 2
+        assert f(np.arange(3)) == 3
+        with pytest.raises(ValueError):
+            Function(len).single_flight(arrays="hash")
+
+    def test_async(self) -> None:
+        calls = []
+
+        async def slow(v):
+            calls.append(v)
+            await asyncio.sleep(0.01)
+            return v + 1
+
+        f = Function(slow).single_flight()
+        assert f.is_async
+
+        async def burst():
+            return await asyncio.gather(*[f(v) for v in [1, 1, 1, 2]])
+
+        assert asyncio.run(burst()) == [2, 2, 2, 3]
+        assert calls == [1, 2]
+        assert asyncio.run(burst()) == [2, 2, 2, 3]
+        assert calls == [1, 2, 1, 2]
+        assert f.function.shared == 4
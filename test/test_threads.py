@@ -0,0 +1,87 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from functionplus import Function
+from functionplus.core import threads
+
+
+def slow(v: float) -> float:
+    time.sleep(0.05)
+    return v
+
+
+class TestConcurrent:
+    @pytest.fixture(scope="class")
+    def x(self) -> Function:
+        return Function.id("x")
+
+    def test_values(self, x: Function) -> None:
+        h = 3 * x**2 - (np.cos @ x) / 7 + abs(-x) @ (x + 1)
+        c = h.concurrent(threshold=0)
+        inputs = np.linspace(-2, 2, 1001)
+        for _ in range(3):
+            assert_array_equal(c(inputs), h(inputs))
+        assert c.name == h.name
+
+    def test_parallelism(self, x: Function) -> None:
+        f = Function(slow)
+        h = (f @ (x + 1)) + (f @ (x + 2)) + f
+        c = h.concurrent()
+        assert c(1) == 6
+        assert c(1) == 6
+
+        info = c.function.concurrency_info()
+        assert info.calls == 2
+        assert info.offloaded >= 2
+        assert info.parallelism > 1
+
+    def test_threshold(self, x: Function) -> None:
+        c = (x * 2 + x).concurrent(threshold=1)
+        for _ in range(3):
+            assert c(2) == 6
+        assert c.function.concurrency_info().offloaded == 0
+
+    def test_errors(self, x: Function) -> None:
+        c = (Function(slow) + 1 / x).concurrent(threshold=0)
+        assert c(1) == 2
+        with pytest.raises(ZeroDivisionError):
+            c(0)
+        with pytest.raises(ValueError):
+            x.concurrent(threshold=-1)
+
+    @pytest.mark.parametrize("workers", [None, 2])
+    def test_nested(self, x: Function, workers) -> None:
+        def fan(f: Function, n: int) -> Function:
+            h = f @ x
+            for i in range(1, n):
+                h = h + f @ (x + i)
+            return h
+
+        def nap(v: float) -> float:
+            time.sleep(0.01)
+            return 1
+
+        executor = workers and ThreadPoolExecutor(workers)
+        inner = fan(Function(nap), 8).concurrent(executor=executor)
+        outer = fan(inner, 8).concurrent(executor=executor)
+        for _ in range(3):
+            assert outer(0) == 64
+        assert outer.function.concurrency_info().offloaded > 0
+
+    def test_async(self, x: Function) -> None:
+        async def increment(v: float) -> float:
+            return v + 1
+
+        h = Function(increment) * x
+        assert h.concurrent() is h
+        assert asyncio.run((h.concurrent() + 1)(2)) == 7
+        with pytest.raises(ValueError):
+            threads.Concurrent(h)
+
+    def test_leaf(self) -> None:
+        assert Function(slow).concurrent()(3) == 3